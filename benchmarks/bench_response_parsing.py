@@ -0,0 +1,130 @@
+"""
+Compares the API page decoders on a recorded 1000-row page.
+
+    python benchmarks/bench_response_parsing.py            # use / synthesise fixtures
+    python benchmarks/bench_response_parsing.py --record   # record real pages first
+
+Recording needs DATA_GOV_API_KEY. Without recorded fixtures a synthetic
+enrolment page is written in all three formats so the script always runs.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / "src" / "api_ingestion"))
+
+from parsers import parse_xml_stream, parse_xml_tree, parse_json_page, parse_csv_page
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+ENROLMENT_URL = "https://api.data.gov.in/resource/ecd49b12-3084-4521-8f7e-ca8bf72069ba"
+FORMATS = ("xml", "json", "csv")
+ROWS = 1000
+
+
+def record_fixtures():
+    import requests
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("DATA_GOV_API_KEY")
+
+    if not api_key:
+        raise RuntimeError("DATA_GOV_API_KEY not found in environment variable")
+
+    for fmt in FORMATS:
+        response = requests.get(
+            ENROLMENT_URL,
+            params={"api-key": api_key, "format": fmt, "limit": ROWS, "offset": 0},
+            timeout=(10, 60)
+        )
+        response.raise_for_status()
+        (FIXTURE_DIR / f"enrolment_page.{fmt}").write_bytes(response.content)
+
+
+def synthesise_fixtures():
+    rng = random.Random(42)
+    fields = ["date", "state", "district", "pincode", "age_0_5", "age_5_17", "age_18_greater"]
+    rows = [
+        {
+            "date": f"{rng.randint(1, 28):02d}-0{rng.randint(1, 9)}-2025",
+            "state": rng.choice(["Uttar Pradesh", "Bihar", "Maharashtra", "West Bengal"]),
+            "district": f"District {rng.randint(1, 80)}",
+            "pincode": str(rng.randint(110000, 855999)),
+            "age_0_5": str(rng.randint(0, 50)),
+            "age_5_17": str(rng.randint(0, 40)),
+            "age_18_greater": str(rng.randint(0, 10)),
+        }
+        for _ in range(ROWS)
+    ]
+
+    items = "".join(
+        '<item type="dict">' + "".join(f"<{f}>{r[f]}</{f}>" for f in fields) + "</item>"
+        for r in rows
+    )
+    (FIXTURE_DIR / "enrolment_page.xml").write_text(
+        '<?xml version="1.0" encoding="UTF-8"?><result>'
+        f"<total>{ROWS}</total><count>{ROWS}</count>"
+        f'<records type="list">{items}</records></result>',
+        encoding="utf-8"
+    )
+
+    (FIXTURE_DIR / "enrolment_page.json").write_text(
+        json.dumps({"total": ROWS, "count": ROWS, "records": rows}),
+        encoding="utf-8"
+    )
+
+    csv_lines = [",".join(fields)] + [",".join(r[f] for f in fields) for r in rows]
+    (FIXTURE_DIR / "enrolment_page.csv").write_text("\n".join(csv_lines) + "\n", encoding="utf-8")
+
+
+def measure(name, parse, payload, repeats):
+    parse(payload)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        df = parse(payload)
+    elapsed = (time.perf_counter() - start) / repeats
+
+    tracemalloc.start()
+    parse(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<22} {elapsed * 1000:8.2f} ms/page "
+        f"{len(df) / elapsed:12,.0f} rows/s "
+        f"{peak / 1024:10,.0f} KiB peak"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--repeats", type=int, default=50)
+
+    args = parser.parse_args()
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+
+    if args.record:
+        record_fixtures()
+    elif not all((FIXTURE_DIR / f"enrolment_page.{fmt}").exists() for fmt in FORMATS):
+        synthesise_fixtures()
+
+    pages = {fmt: (FIXTURE_DIR / f"enrolment_page.{fmt}").read_bytes() for fmt in FORMATS}
+
+    measure("xml (ElementTree)", lambda b: parse_xml_tree(b.decode("utf-8")), pages["xml"], args.repeats)
+    measure("xml (stream)", lambda b: parse_xml_stream(io.BytesIO(b)), pages["xml"], args.repeats)
+    measure("json", parse_json_page, pages["json"], args.repeats)
+    measure("csv", parse_csv_page, pages["csv"], args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Times Isolation Forest scoring of a synthetic feature matrix: sklearn's
+single-threaded decision_function against block-parallel score_rows.
+
+    python benchmarks/bench_scoring.py                 # 5M rows, every core
+    python benchmarks/bench_scoring.py --rows 20000000 --n-jobs 8
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / "src"))
+
+from modeling.anomaly import FEATURE_COLS, N_JOBS, build_model, score_rows
+
+FIT_ROWS = 100_000
+
+
+def measure(name, score, X):
+    start = time.perf_counter()
+    scores = score(X)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<28} {elapsed:8.2f} s {len(X) / elapsed:14,.0f} rows/s")
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--n-jobs", type=int, default=N_JOBS)
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.standard_normal((args.rows, len(FEATURE_COLS)), dtype=np.float32)
+
+    model = build_model(args.n_jobs).fit(X[:FIT_ROWS])
+    print(f"{args.rows:,} rows, {os.cpu_count()} cores, n_jobs={args.n_jobs}")
+
+    single = measure("decision_function", lambda X: model.decision_function(X).astype(np.float32), X)
+    blocked = measure("score_rows", lambda X: score_rows(model, X, args.n_jobs), X)
+
+    print(f"identical scores: {np.array_equal(single, blocked)}")
+
+
+if __name__ == "__main__":
+    main()
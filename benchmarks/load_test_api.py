@@ -0,0 +1,134 @@
+"""
+Load-tests a running results API (python src/serve_api.py): keep-alive
+clients replay a mix of series, top and district queries and report
+latency percentiles and throughput.
+
+    python benchmarks/load_test_api.py                          # 2,000 requests, 20 clients
+    python benchmarks/load_test_api.py --requests 20000 --concurrency 100
+    python benchmarks/load_test_api.py --conditional            # revalidate with If-None-Match
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+GRANULARITIES = ("daily", "weekly", "monthly", "quarterly")
+
+
+async def request(reader, writer, host, target, etag=None):
+    """(status, headers, body) of one GET on a kept-alive connection."""
+    lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(status_line.split()[1]), headers, body
+
+
+def build_targets(districts, n, rng):
+    targets = []
+
+    for _ in range(n):
+        kind = rng.random()
+
+        if kind < 0.7:
+            state, district = rng.choice(districts)
+            query = {"state": state, "district": district, "granularity": rng.choice(GRANULARITIES)}
+            targets.append("/series?" + urlencode(query))
+        elif kind < 0.9:
+            targets.append("/top?" + urlencode({"k": rng.choice((10, 25, 50))}))
+        else:
+            targets.append("/districts?" + urlencode({"offset": rng.randrange(0, 500, 100), "limit": 100}))
+
+    return targets
+
+
+async def client(host, port, targets, conditional, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            status, headers, _ = await request(reader, writer, host, target, etags.get(target) if conditional else None)
+            latencies.append(time.perf_counter() - start)
+
+            statuses[status] = statuses.get(status, 0) + 1
+            if "etag" in headers:
+                etags[target] = headers["etag"]
+    finally:
+        writer.close()
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+
+    reader, writer = await asyncio.open_connection(host, port)
+    districts = []
+    offset = 0
+    while offset is not None:
+        _, _, body = await request(reader, writer, host, f"/districts?offset={offset}&limit=5000")
+        page = json.loads(body)
+        districts += [(row["state"], row["district"]) for row in page["items"]]
+        offset = page["next_offset"]
+    writer.close()
+
+    if not districts:
+        raise SystemExit("The API has no districts; run the pipeline first")
+
+    rng = random.Random(42)
+    targets = build_targets(districts, args.requests, rng)
+    shares = [targets[i::args.concurrency] for i in range(args.concurrency)]
+
+    latencies = []
+    statuses = {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, share, args.conditional, latencies, statuses)
+        for share in shares if share
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    print(f"{len(latencies):,} requests, {args.concurrency} clients, {len(districts):,} districts")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    print(f"p50 {np.percentile(latencies, 50):8.2f} ms")
+    print(f"p99 {np.percentile(latencies, 99):8.2f} ms")
+    print(f"max {latencies.max():8.2f} ms")
+    print(f"{len(latencies) / elapsed:,.0f} requests/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--conditional",
+        action="store_true",
+        help="Send each client's last ETag for a repeated query, as a caching client would"
+    )
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import json
+import sys
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -7,9 +9,87 @@ st.set_page_config(layout="wide", page_title="District Anomaly Dashboard")
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data" / "processed"
+REGISTRY_DIR = PROJECT_ROOT / "models" / "registry" / "daily"
 
-df = pd.read_csv(DATA_DIR / "daily_anomaly_results.csv")
-df["date"] = pd.to_datetime(df["date"])
+RESULTS_PATH = DATA_DIR / "daily_anomaly_results.csv"
+EXPLANATIONS_PATH = DATA_DIR / "daily_anomaly_explanations.csv"
+ROLLUPS_DIR = DATA_DIR / "daily_district_rollups"
+STORE_PATH = DATA_DIR / "daily_anomaly_results.arrow"
+SHAPES_PATH = DATA_DIR / "district_shapes.geojson"
+REFERENCE_DIR = PROJECT_ROOT / "data" / "reference"
+GEOJSON_PATH = REFERENCE_DIR / "districts.geojson"
+
+UNITS = {"daily": "Days", "weekly": "Weeks", "monthly": "Months", "quarterly": "Quarters"}
+
+# Markers are only drawn on charts with fewer points than this
+CHART_MARKERS = 400
+
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.geo_reference import GeoResolver
+from serving.downsample import lttb
+from serving.geo import district_key, load_district_shapes
+from serving.periods import GRANULARITIES, load_period_store, period_table
+from serving.results_store import ResultsStore, artifact_version, load_results_store
+from serving.rollups import META_FILE, DistrictRollups
+
+
+# Streamlit reruns this script on every widget change. The tables are
+# loaded once per file version (mtime, size) and shared by every session;
+# the cached objects must not be modified.
+
+@st.cache_resource(max_entries=1, show_spinner="Loading anomaly results...")
+def load_results(version):
+    # Memory-mapped sorted store written by the pipeline, when it is current
+    return load_results_store(RESULTS_PATH, STORE_PATH)
+
+
+@st.cache_resource(max_entries=len(GRANULARITIES))
+def load_period(granularity, version):
+    # Weekly and quarterly rollups and the monthly model's results, all
+    # written by the pipeline
+    return load_period_store(DATA_DIR, granularity)
+
+
+@st.cache_resource(max_entries=1)
+def load_explanations(version):
+    # Per-feature contributions of every anomalous day, written at scoring
+    # time; indexed like the results so a district's days are one slice
+    if version is None:
+        return None
+
+    return ResultsStore(pd.read_csv(EXPLANATIONS_PATH, parse_dates=["date"]))
+
+
+@st.cache_resource(max_entries=1)
+def load_rollups(version, results_version):
+    # Built by the pipeline after scoring; from the loaded results otherwise
+    if version is None:
+        return DistrictRollups.from_frame(load_results(results_version).frame)
+
+    return DistrictRollups.load(ROLLUPS_DIR)
+
+
+@st.cache_resource(max_entries=1)
+def load_shapes(source_version, shapes_version):
+    # Simplified by the pipeline; simplified here (and cached on disk) if not
+    resolver = GeoResolver(REFERENCE_DIR / "districts.csv", REFERENCE_DIR / "district_resolution_cache.json")
+    return load_district_shapes(GEOJSON_PATH, SHAPES_PATH, resolver)
+
+
+@st.cache_data(max_entries=1)
+def load_manifest(version):
+    # Model version the results were scored with (the registry's CURRENT pointer)
+    if version is None:
+        return None
+
+    current = (REGISTRY_DIR / "CURRENT").read_text().strip()
+    return json.loads((REGISTRY_DIR / current / "manifest.json").read_text())
+
+
+results_version = (artifact_version(RESULTS_PATH), artifact_version(STORE_PATH))
+store = load_results(results_version)
+explanations = load_explanations(artifact_version(EXPLANATIONS_PATH))
+rollups = load_rollups(artifact_version(ROLLUPS_DIR / META_FILE), results_version)
 
 st.markdown(
     """
@@ -22,47 +102,48 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-states = sorted(
-    s for s in df["state"].astype(str).unique()
-    if any(c.isalpha() for c in s)
-)
-
 st.sidebar.title("Filters")
 
-state = st.sidebar.selectbox("State", states)
+state = st.sidebar.selectbox("State", store.states)
 
-districts = (
-    df[df["state"] == state]["district"]
-    .astype(str)
-    .unique()
-)
+district = st.sidebar.selectbox("District", store.districts.get(state, []))
 
-districts = sorted(
-    d for d in districts if any(c.isalpha() for c in d)
+# Daily and monthly are each model's own results; weekly and quarterly are
+# rollups of the daily results
+granularity = st.sidebar.radio(
+    "Granularity",
+    [g for g in GRANULARITIES if period_table(DATA_DIR, g) is not None],
+    format_func=str.title,
+    horizontal=True
 )
+unit = UNITS[granularity]
 
-district = st.sidebar.selectbox("District", districts)
+manifest = load_manifest(artifact_version(REGISTRY_DIR / "CURRENT"))
+if manifest is not None:
+    st.sidebar.caption(f"Model {manifest['version']} · trained on {manifest['rows']:,} rows")
 
 date_range = st.sidebar.date_input(
     "Date Range",
-    [df["date"].min(), df["date"].max()]
+    list(store.date_range)
 )
 
-filtered = df[
-    (df["state"] == state) &
-    (df["district"] == district) &
-    (df["date"].between(
-        pd.to_datetime(date_range[0]),
-        pd.to_datetime(date_range[1])
-    ))
-]
+# While the second date is being picked date_input returns one date
+if len(date_range) == 1:
+    date_range = (date_range[0], store.date_range[1])
+
+if granularity == "daily":
+    view = store
+else:
+    view = load_period(granularity, artifact_version(period_table(DATA_DIR, granularity)))
+
+filtered = view.district_rows(state, district, date_range[0], date_range[1])
 
 st.title(f"{district}, {state}")
 
 c1, c2, c3 = st.columns(3)
 
 c1.metric(
-    "Anomaly % Days",
+    f"Anomaly % {unit}",
     f"{filtered['is_anomaly'].mean() * 100:.1f}%"
 )
 
@@ -76,11 +157,18 @@ c3.metric(
     round(filtered["biometric_load_ratio"].max(), 2)
 )
 
+# Long histories are drawn from a shape-preserving subset of the points;
+# anomalies are few and are all drawn
+points = filtered.iloc[lttb(
+    filtered["date"].to_numpy(dtype="datetime64[ns]").astype("int64"),
+    filtered["enrolment_pressure"].to_numpy()
+)]
+
 fig = px.line(
-    filtered,
+    points,
     x="date",
     y="enrolment_pressure",
-    markers=True
+    markers=len(points) < CHART_MARKERS
 )
 
 anomalies = filtered[filtered["is_anomaly"] == 1]
@@ -95,6 +183,44 @@ fig.add_scatter(
 
 st.plotly_chart(fig, use_container_width=True)
 
+# anomaly_score is the Isolation Forest decision function: the lower, the
+# more anomalous (below 0 is flagged)
+if not anomalies.empty:
+    st.subheader(f"Most Severe Anomaly {unit}")
+    st.dataframe(
+        anomalies.nsmallest(10, "anomaly_score")[
+            ["date", "anomaly_score", "enrolment_pressure", "biometric_load_ratio"]
+        ]
+    )
+
+# Which features pushed the day's score below the expected score (negative
+# contributions make a day more anomalous; together they sum to the gap)
+if granularity == "daily" and explanations is not None:
+    day_explanations = explanations.district_rows(state, district, date_range[0], date_range[1])
+    day_explanations = day_explanations[day_explanations["date"].isin(anomalies["date"])]
+else:
+    day_explanations = None
+
+if day_explanations is not None and not day_explanations.empty:
+    st.subheader("Why Was This Day Flagged?")
+
+    day = st.selectbox(
+        "Anomaly Day",
+        day_explanations.sort_values("anomaly_score")["date"].dt.date
+    )
+    row = day_explanations[day_explanations["date"].dt.date == day].iloc[0]
+
+    contributions = pd.DataFrame({
+        "Feature": [col.removesuffix("_contribution") for col in row.index if col.endswith("_contribution")],
+        "Contribution": [row[col] for col in row.index if col.endswith("_contribution")]
+    }).sort_values("Contribution")
+
+    st.caption(f"Score {row['anomaly_score']:.3f} vs expected {row['expected_score']:.3f}")
+    st.plotly_chart(
+        px.bar(contributions, x="Contribution", y="Feature", orientation="h"),
+        use_container_width=True
+    )
+
 feature_cols = [
     "enrolment_pressure",
     "biometric_load_ratio",
@@ -103,7 +229,7 @@ feature_cols = [
 ]
 
 if not filtered.empty:
-    latest = filtered.sort_values("date").iloc[-1]
+    latest = filtered.iloc[-1]
 
     feature_df = pd.DataFrame({
         "Feature": feature_cols,
@@ -113,22 +239,36 @@ if not filtered.empty:
     st.subheader("Latest Feature Snapshot")
     st.bar_chart(feature_df.set_index("Feature"))
 
-top = (
-    df[df["date"].between(
-        pd.to_datetime(date_range[0]),
-        pd.to_datetime(date_range[1])
-    )]
-    .groupby(["state", "district"])
-    .agg(
-        anomaly_days=("is_anomaly", "sum"),
-        avg_pressure=("enrolment_pressure", "mean")
-    )
-    .reset_index()
-)
-
-top = top[
-    top["district"].astype(str).apply(lambda x: any(c.isalpha() for c in x))
-].sort_values("anomaly_days", ascending=False).head(10)
+top = rollups.top(10, date_range[0], date_range[1])
 
 st.subheader("Top Anomalous Districts")
 st.dataframe(top)
+
+# Every district coloured from the rollups of the selected range; the
+# row-level results are not read
+st.subheader("District Anomaly Map")
+
+shapes = load_shapes(artifact_version(GEOJSON_PATH), artifact_version(SHAPES_PATH))
+
+if shapes is None:
+    st.caption(f"Add district boundaries as {GEOJSON_PATH.relative_to(PROJECT_ROOT)} to see the map.")
+else:
+    colour = st.radio("Colour By", ["Anomaly Rate", "Mean Score"], horizontal=True)
+    summary = rollups.summary(date_range[0], date_range[1])
+    summary["key"] = [district_key(s, d) for s, d in zip(summary["state"], summary["district"])]
+
+    fig = px.choropleth(
+        summary,
+        geojson=shapes,
+        locations="key",
+        featureidkey="properties.key",
+        color="anomaly_rate" if colour == "Anomaly Rate" else "mean_score",
+        # Low scores are the anomalous ones
+        color_continuous_scale="Reds" if colour == "Anomaly Rate" else "Reds_r",
+        hover_name="district",
+        hover_data={"key": False, "state": True, "anomaly_days": True, "anomaly_rate": ":.1%", "mean_score": ":.3f"}
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(height=700, margin=dict(l=0, r=0, t=0, b=0))
+
+    st.plotly_chart(fig, use_container_width=True)
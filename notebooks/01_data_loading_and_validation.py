@@ -0,0 +1,86 @@
+import argparse
+import sys
+from pathlib import Path
+
+
+# Resolve project paths safely (independent of working directory)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+RAW_ROOT = PROJECT_ROOT / "data" / "raw"
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+REFERENCE_DIR = PROJECT_ROOT / "data" / "reference"
+
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.cleaning import SCHEMAS, run_cleaning
+from processing.geo_reference import GeoResolver
+
+# Ensure output directory exists
+PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+
+parser = argparse.ArgumentParser(
+    description="Clean and aggregate raw enrolment, biometric and demographic batches"
+)
+parser.add_argument(
+    "datasets",
+    nargs="*",
+    metavar="DATASET",
+    help=f"Datasets to clean: {', '.join(SCHEMAS)} (default: all)"
+)
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="Only clean raw files not yet in the manifest and merge them into the existing outputs"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="Processes used to read raw files (default: one per CPU)"
+)
+parser.add_argument(
+    "--reference",
+    type=Path,
+    default=REFERENCE_DIR / "districts.csv",
+    help="Canonical district dictionary (state, district, district_code)"
+)
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Clean raw files in groups that fit this budget (default: all at once)"
+)
+parser.add_argument(
+    "--trace-memory",
+    action="store_true",
+    help="Report each dataset's traced Python allocation peak (several times slower)"
+)
+args = parser.parse_args()
+
+unknown = set(args.datasets) - set(SCHEMAS)
+if unknown:
+    parser.error(f"Unknown datasets: {', '.join(sorted(unknown))}")
+
+
+# Shared by all datasets so a spelling resolved once is never matched again
+resolver = GeoResolver(args.reference, REFERENCE_DIR / "district_resolution_cache.json")
+
+if resolver.empty:
+    print(f"No district reference at {args.reference}; using title-cased names")
+
+for name in args.datasets or SCHEMAS:
+    print(f"\n▶ Cleaning {name}")
+
+    run_cleaning(
+        SCHEMAS[name],
+        RAW_ROOT / name,
+        PROCESSED_DIR,
+        incremental=args.incremental,
+        workers=args.workers,
+        resolver=resolver,
+        budget_mb=args.memory_budget_mb,
+        trace_memory=args.trace_memory
+    )
+
+    print(f"✅ {name.title()} cleaning & aggregation completed successfully")
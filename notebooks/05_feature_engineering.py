@@ -1,5 +1,5 @@
-import pandas as pd
-import numpy as np
+import argparse
+import sys
 from pathlib import Path
 
 
@@ -8,80 +8,55 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
-MASTER_PATH = PROCESSED_DIR / "master_district_daily.csv"
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.table_io import table_exists
+from features.engineering import update_daily_features
 
-if not MASTER_PATH.exists():
+MASTER_STEM = PROCESSED_DIR / "master_district_daily"
+
+if not table_exists(MASTER_STEM):
     raise RuntimeError(
-        "master_district_daily.csv not found. Run merge step first."
+        "master_district_daily not found. Run merge step first."
     )
 
 
-# Load master daily dataset
-
-df = pd.read_csv(MASTER_PATH)
-
-
-# Schema validation (this will FAIL if wrong file is used)
-
-required_cols = {
-    "demographic_count",
-    "enrolment_count",
-    "biometric_count",
-    "demo_age_5_17",
-    "demo_age_17_",
-    "date"
-}
-
-missing = required_cols - set(df.columns)
-if missing:
-    raise RuntimeError(f"Missing required columns: {missing}")
-
-
-# Feature engineering (USES demographic_count ONLY)
-
-features = df.copy()
-
-features["enrolment_pressure"] = (
-    features["enrolment_count"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["biometric_load_ratio"] = (
-    features["biometric_count"] /
-    features["enrolment_count"].replace(0, np.nan)
-).fillna(0)
-
-features["youth_population_ratio"] = (
-    features["demo_age_5_17"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["adult_population_ratio"] = (
-    features["demo_age_17_"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-
-# Temporal features
-
-features["date"] = pd.to_datetime(features["date"], errors="coerce")
-features["day_of_week"] = features["date"].dt.dayofweek
-features["month"] = features["date"].dt.month
-
-
-# Binary signal
-
-features["high_enrolment_ratio"] = (
-    features["enrolment_pressure"] >
-    features["enrolment_pressure"].quantile(0.75)
-).astype(int)
-
-
-# Save features
-
-features.to_csv(
-    PROCESSED_DIR / "master_features_district_daily.csv",
-    index=False
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Stream master_district_daily in chunks that fit this budget (default: all at once)"
+)
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="Only append features for days after the saved per-district state"
+)
+parser.add_argument(
+    "--per-state-thresholds",
+    action="store_true",
+    help="Flag high enrolment pressure against each state's own quantile"
+)
+args = parser.parse_args()
+
+FEATURES_PATH = PROCESSED_DIR / "master_features_district_daily.csv"
+TEMPORAL_STATE_STEM = PROCESSED_DIR / "daily_temporal_state"
+SKETCH_PATH = PROCESSED_DIR / "daily_pressure_sketch.npz"
+
+
+# Same update as the pipeline's feature step: the saved per-district state
+# is extended with the new days only when it is still valid, otherwise the
+# features are rebuilt from full history. Either way the state for the next
+# incremental run is saved.
+
+update_daily_features(
+    MASTER_STEM,
+    FEATURES_PATH,
+    TEMPORAL_STATE_STEM,
+    SKETCH_PATH,
+    per_state=args.per_state_thresholds,
+    budget_mb=args.memory_budget_mb,
+    incremental=args.incremental
 )
 
 print("✅ Daily feature engineering completed successfully")
@@ -1,16 +1,28 @@
 import pandas as pd
-import numpy as np
+import argparse
+import sys
 from pathlib import Path
-from sklearn.ensemble import IsolationForest
-import joblib
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 MODEL_DIR = PROJECT_ROOT / "models"
 
-MODEL_DIR.mkdir(parents=True, exist_ok=True)
+sys.path.append(str(PROJECT_ROOT / "src"))
+from modeling.anomaly import N_JOBS, train_monthly
+from modeling.explain import write_explanations
+from modeling.partitioned import PARTITIONS
+from modeling.scoring import ScoredRows, train_daily
+from processing.chunked import DEFAULT_MEMORY_BUDGET_MB
+from serving.periods import build_period_rollups
+from serving.rollups import DistrictRollups
 
 FEATURE_PATH = PROCESSED_DIR / "master_features_district_daily.csv"
+RESULTS_PATH = PROCESSED_DIR / "daily_anomaly_results.csv"
+INDEX_PATH = PROCESSED_DIR / "daily_scored_rows.npz"
+EXPLANATIONS_PATH = PROCESSED_DIR / "daily_anomaly_explanations.csv"
+ROLLUPS_DIR = PROCESSED_DIR / "daily_district_rollups"
+MONTHLY_FEATURE_PATH = PROCESSED_DIR / "master_features_district_monthly.csv"
+MONTHLY_RESULTS_STEM = PROCESSED_DIR / "monthly_anomaly_results"
 
 if not FEATURE_PATH.exists():
     raise RuntimeError(
@@ -18,53 +30,57 @@ if not FEATURE_PATH.exists():
         "Run feature engineering first."
     )
 
-df = pd.read_csv(FEATURE_PATH)
-
-feature_cols = [
-    "enrolment_pressure",
-    "biometric_load_ratio",
-    "youth_population_ratio",
-    "adult_population_ratio"
-]
-
-missing = set(feature_cols) - set(df.columns)
-if missing:
-    raise RuntimeError(f"Missing required feature columns: {missing}")
-
-X = df[feature_cols]
-
-# Scale features (robust to outliers)
-from sklearn.preprocessing import StandardScaler
-
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Train Isolation Forest
-
-model = IsolationForest(
-    n_estimators=200,
-    contamination=0.05,
-    random_state=42
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Fit on a bounded sample and score in chunks that fit this budget (default: all at once)"
 )
-
-df["anomaly_score"] = model.fit_predict(X_scaled)
-df["is_anomaly"] = (df["anomaly_score"] == -1).astype(int)
-
-# Save outputs
-
-df.to_csv(
-    PROCESSED_DIR / "daily_anomaly_results.csv",
-    index=False
+parser.add_argument(
+    "--n-jobs",
+    type=int,
+    default=N_JOBS,
+    help="Threads used to fit and score the forest (-1: every core)"
 )
-
-joblib.dump(
-    model,
-    MODEL_DIR / "isolation_forest_daily.joblib"
+parser.add_argument(
+    "--partition",
+    choices=PARTITIONS,
+    default=None,
+    help="Fit one model per state or per district cluster (default: one global model)"
+)
+args = parser.parse_args()
+
+# Full fit; also records the drift reference and scored-row index that
+# 11_score_daily_anomalies.py scores new rows against
+train_daily(
+    FEATURE_PATH.with_suffix(""),
+    RESULTS_PATH,
+    MODEL_DIR,
+    ScoredRows(INDEX_PATH),
+    args.memory_budget_mb,
+    n_jobs=args.n_jobs,
+    partition=args.partition
 )
 
-joblib.dump(
-    scaler,
-    MODEL_DIR / "scaler_daily.joblib"
+# Feature contributions of every anomalous day, for the dashboard
+write_explanations(
+    RESULTS_PATH,
+    EXPLANATIONS_PATH,
+    MODEL_DIR,
+    args.memory_budget_mb or DEFAULT_MEMORY_BUDGET_MB,
+    args.partition
 )
 
+# Per-district prefix sums behind the dashboard's top districts table, and
+# its weekly and quarterly views
+DistrictRollups.build(RESULTS_PATH.with_suffix(""), ROLLUPS_DIR)
+build_period_rollups(PROCESSED_DIR)
+
+# Monthly model on the same code path (small table, always in memory)
+if MONTHLY_FEATURE_PATH.exists():
+    train_monthly(pd.read_csv(MONTHLY_FEATURE_PATH), MONTHLY_RESULTS_STEM, MODEL_DIR, args.n_jobs)
+else:
+    print("⚠️ master_features_district_monthly.csv not found, skipping the monthly model")
+
 print("✅ Anomaly detection model trained and results saved")
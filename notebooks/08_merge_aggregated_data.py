@@ -1,5 +1,5 @@
-import pandas as pd
-import numpy as np
+import argparse
+import sys
 from pathlib import Path
 
 
@@ -8,85 +8,46 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-print("RUNNING FEATURE FILE:", __file__)
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.merge import merge_daily_tables
+from processing.table_io import table_exists
 
-MASTER_PATH = PROCESSED_DIR / "master_district_daily.csv"
+PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-if not MASTER_PATH.exists():
-    raise RuntimeError("master_district_daily.csv not found. Run merge step first.")
+AGG_STEMS = [
+    PROCESSED_DIR / "enrolment_agg",
+    PROCESSED_DIR / "biometric_agg",
+    PROCESSED_DIR / "demographic_agg",
+]
 
+MASTER_STEM = PROCESSED_DIR / "master_district_daily"
 
-# Load master daily dataset
 
-df = pd.read_csv(MASTER_PATH)
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--partition-freq",
+    default=None,
+    help="Merge one date partition at a time, e.g. M for monthly (default: all at once)"
+)
+args = parser.parse_args()
 
 
 # Schema validation (fail fast, clearly)
 
-required_cols = {
-    "demographic_count",
-    "enrolment_count",
-    "biometric_count",
-    "demo_age_5_17",
-    "demo_age_17_",
-    "date"
-}
-
-missing = required_cols - set(df.columns)
+missing = [stem.name for stem in AGG_STEMS if not table_exists(stem)]
 if missing:
-    raise RuntimeError(f"Missing required columns: {missing}")
-
-
-# Feature engineering
-
-features = df.copy()
-
-features["enrolment_pressure"] = (
-    features["enrolment_count"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["biometric_load_ratio"] = (
-    features["biometric_count"] /
-    features["enrolment_count"].replace(0, np.nan)
-).fillna(0)
-
-features["youth_population_ratio"] = (
-    features["demo_age_5_17"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["adult_population_ratio"] = (
-    features["demo_age_17_"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-
-# Temporal features
-
-features["date"] = pd.to_datetime(
-    features["date"],
-    errors="coerce"
-)
-
-features["day_of_week"] = features["date"].dt.dayofweek
-features["month"] = features["date"].dt.month
-
-
-# Binary signal (high stress districts)
-
-features["high_enrolment_ratio"] = (
-    features["enrolment_pressure"] >
-    features["enrolment_pressure"].quantile(0.75)
-).astype(int)
+    raise RuntimeError(
+        f"Missing daily aggregates: {missing}. Run cleaning step first."
+    )
 
 
-# Save features
+# Sort-merge outer join on (date, state, district)
 
-features.to_csv(
-    PROCESSED_DIR / "master_features_district_daily.csv",
-    index=False
+rows = merge_daily_tables(
+    AGG_STEMS,
+    MASTER_STEM,
+    freq=args.partition_freq
 )
 
-print("✅ Daily feature engineering completed successfully")
+print(f"Merged district-days: {rows}")
+print("✅ Daily merge completed successfully")
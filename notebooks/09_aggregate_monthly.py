@@ -1,4 +1,5 @@
-import pandas as pd
+import argparse
+import sys
 from pathlib import Path
 
 
@@ -7,44 +8,35 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
-MASTER_DAILY_PATH = PROCESSED_DIR / "master_district_daily.csv"
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.table_io import read_table, table_exists
+from processing.monthly import aggregate_monthly, aggregate_monthly_chunked
 
-if not MASTER_DAILY_PATH.exists():
+MASTER_DAILY_STEM = PROCESSED_DIR / "master_district_daily"
+
+if not table_exists(MASTER_DAILY_STEM):
     raise RuntimeError(
-        "master_district_daily.csv not found. "
+        "master_district_daily not found. "
         "Run daily merge step first."
     )
 
 
-# Load daily master data
-
-daily_df = pd.read_csv(MASTER_DAILY_PATH)
-
-# Ensure date is datetime
-daily_df["date"] = pd.to_datetime(
-    daily_df["date"],
-    errors="coerce"
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Aggregate master_district_daily in chunks that fit this budget (default: all at once)"
 )
+args = parser.parse_args()
 
 
 # Monthly aggregation
 
-daily_df["year_month"] = daily_df["date"].dt.to_period("M")
-
-monthly_agg = (
-    daily_df
-    .groupby(["year_month", "state", "district"], as_index=False)
-    .agg({
-        "demographic_count": "sum",
-        "enrolment_count": "sum",
-        "biometric_count": "sum",
-        "demo_age_5_17": "sum",
-        "demo_age_17_": "sum"
-    })
-)
-
-# Convert Period to timestamp (month start)
-monthly_agg["year_month"] = monthly_agg["year_month"].dt.to_timestamp()
+if args.memory_budget_mb is None:
+    monthly_agg = aggregate_monthly(read_table(MASTER_DAILY_STEM))
+else:
+    monthly_agg = aggregate_monthly_chunked(MASTER_DAILY_STEM, args.memory_budget_mb)
 
 
 # Save monthly aggregated data
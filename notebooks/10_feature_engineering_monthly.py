@@ -1,5 +1,6 @@
 import pandas as pd
-import numpy as np
+import argparse
+import sys
 from pathlib import Path
 
 
@@ -8,6 +9,10 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
 
+sys.path.append(str(PROJECT_ROOT / "src"))
+from features.engineering import build_monthly_features
+from features.thresholds import PressureThresholds
+
 MONTHLY_PATH = PROCESSED_DIR / "master_district_monthly.csv"
 
 if not MONTHLY_PATH.exists():
@@ -17,69 +22,23 @@ if not MONTHLY_PATH.exists():
     )
 
 
-# Load monthly master dataset
-
-df = pd.read_csv(MONTHLY_PATH)
-
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--per-state-thresholds",
+    action="store_true",
+    help="Flag high enrolment pressure against each state's own quantile"
+)
+args = parser.parse_args()
 
-# Schema validation
 
-required_cols = {
-    "demographic_count",
-    "enrolment_count",
-    "biometric_count",
-    "demo_age_5_17",
-    "demo_age_17_",
-    "year_month"
-}
+# Load monthly master dataset
 
-missing = required_cols - set(df.columns)
-if missing:
-    raise RuntimeError(f"Missing required columns: {missing}")
+df = pd.read_csv(MONTHLY_PATH)
 
 
 # Feature engineering (monthly)
 
-features = df.copy()
-
-features["enrolment_pressure"] = (
-    features["enrolment_count"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["biometric_load_ratio"] = (
-    features["biometric_count"] /
-    features["enrolment_count"].replace(0, np.nan)
-).fillna(0)
-
-features["youth_population_ratio"] = (
-    features["demo_age_5_17"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-features["adult_population_ratio"] = (
-    features["demo_age_17_"] /
-    features["demographic_count"].replace(0, np.nan)
-).fillna(0)
-
-
-# Temporal features
-
-features["year_month"] = pd.to_datetime(
-    features["year_month"],
-    errors="coerce"
-)
-
-features["year"] = features["year_month"].dt.year
-features["month"] = features["year_month"].dt.month
-
-
-# Monthly signal
-
-features["high_enrolment_pressure"] = (
-    features["enrolment_pressure"] >
-    features["enrolment_pressure"].quantile(0.75)
-).astype(int)
+features = build_monthly_features(df, PressureThresholds(per_state=args.per_state_thresholds))
 
 # Save monthly features
 
@@ -0,0 +1,97 @@
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+MODEL_DIR = PROJECT_ROOT / "models"
+
+sys.path.append(str(PROJECT_ROOT / "src"))
+from modeling.anomaly import N_JOBS
+from modeling.partitioned import PARTITIONS
+from modeling.scoring import (
+    DRIFT_PSI_THRESHOLD,
+    RETRAIN_INTERVAL_DAYS,
+    SCORE_BATCH_ROWS,
+    score_daily,
+)
+from serving.periods import build_period_rollups
+from serving.rollups import DistrictRollups
+
+FEATURE_PATH = PROCESSED_DIR / "master_features_district_daily.csv"
+RESULTS_PATH = PROCESSED_DIR / "daily_anomaly_results.csv"
+INDEX_PATH = PROCESSED_DIR / "daily_scored_rows.npz"
+EXPLANATIONS_PATH = PROCESSED_DIR / "daily_anomaly_explanations.csv"
+ROLLUPS_DIR = PROCESSED_DIR / "daily_district_rollups"
+
+if not FEATURE_PATH.exists():
+    raise RuntimeError(
+        "master_features_district_daily.csv not found. "
+        "Run feature engineering first."
+    )
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--retrain",
+    action="store_true",
+    help="Refit the model on every row instead of scoring new ones"
+)
+parser.add_argument(
+    "--drift-threshold",
+    type=float,
+    default=DRIFT_PSI_THRESHOLD,
+    help="Retrain when any feature of the new rows drifts past this PSI"
+)
+parser.add_argument(
+    "--retrain-days",
+    type=float,
+    default=RETRAIN_INTERVAL_DAYS,
+    help="Retrain once the saved model is this many days old"
+)
+parser.add_argument(
+    "--batch-rows",
+    type=int,
+    default=SCORE_BATCH_ROWS,
+    help="Rows scored and appended per batch"
+)
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Scan the features, and retrain if needed, in chunks that fit this budget"
+)
+parser.add_argument(
+    "--n-jobs",
+    type=int,
+    default=N_JOBS,
+    help="Threads used to fit and score the forest (-1: every core)"
+)
+parser.add_argument(
+    "--partition",
+    choices=PARTITIONS,
+    default=None,
+    help="Fit one model per state or per district cluster (default: one global model)"
+)
+args = parser.parse_args()
+
+score_daily(
+    FEATURE_PATH.with_suffix(""),
+    RESULTS_PATH,
+    MODEL_DIR,
+    INDEX_PATH,
+    budget_mb=args.memory_budget_mb,
+    retrain=args.retrain,
+    drift_threshold=args.drift_threshold,
+    retrain_days=args.retrain_days,
+    batch_rows=args.batch_rows,
+    n_jobs=args.n_jobs,
+    partition=args.partition,
+    explanations_path=EXPLANATIONS_PATH
+)
+
+# Per-district prefix sums behind the dashboard's top districts table, and
+# its weekly and quarterly views
+DistrictRollups.build(RESULTS_PATH.with_suffix(""), ROLLUPS_DIR)
+build_period_rollups(PROCESSED_DIR)
+
+print("✅ Daily anomaly results up to date")
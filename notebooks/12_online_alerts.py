@@ -0,0 +1,45 @@
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+
+sys.path.append(str(PROJECT_ROOT / "src"))
+from processing.table_io import table_exists
+from modeling.online import update_alerts
+
+MASTER_STEM = PROCESSED_DIR / "master_district_daily"
+STATE_PATH = PROCESSED_DIR / "online_detector_state.npz"
+ALERTS_PATH = PROCESSED_DIR / "anomaly_alerts.csv"
+
+if not table_exists(MASTER_STEM):
+    raise RuntimeError(
+        "master_district_daily not found. "
+        "Run merge step first."
+    )
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--reset",
+    action="store_true",
+    help="Drop the detector state and alerts and replay the whole table"
+)
+parser.add_argument(
+    "--memory-budget-mb",
+    type=float,
+    default=None,
+    help="Feed the history in chunks that fit this budget when it has to be replayed"
+)
+args = parser.parse_args()
+
+if args.reset:
+    STATE_PATH.unlink(missing_ok=True)
+    ALERTS_PATH.unlink(missing_ok=True)
+
+alerts = update_alerts(MASTER_STEM, STATE_PATH, ALERTS_PATH, args.memory_budget_mb)
+
+if not alerts.empty:
+    print(alerts.sort_values("z", key=abs, ascending=False).head(20).to_string(index=False))
+
+print("✅ Online anomaly alerts up to date")
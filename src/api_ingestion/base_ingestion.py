@@ -1,25 +1,92 @@
+import json
 import requests
-import xml.etree.ElementTree as ET
-import pandas as pd
+import threading
 import time
-from requests.exceptions import ReadTimeout, ConnectionError
+from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ReadTimeout, ConnectionError, ChunkedEncodingError
+from xml.etree.ElementTree import ParseError
+from parsers import parse_xml_stream, parse_json_page, parse_csv_page
 
 LIMIT = 1000
 BATCH_SIZE = 2000
 SLEEP_SECONDS = 0.5
 MAX_RETRIES = 5
 
+# Concurrent mode: pages in flight at once and the global request rate
+# shared by every worker (same pacing as the sequential SLEEP_SECONDS loop)
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 1 / SLEEP_SECONDS
+
+# Response formats offered by the data.gov.in resource API. JSON is the
+# default: an XML page costs about three times the CPU to parse, although
+# streamed XML keeps the least memory per page (see
+# benchmarks/bench_response_parsing.py)
+RESPONSE_FORMATS = ("xml", "json", "csv")
+DEFAULT_RESPONSE_FORMAT = "json"
+
+# Raw batch storage: one appended CSV per batch, or one compressed Parquet
+# file per page carrying its offset range and fetch time in the footer
+STORAGE_FORMATS = ("csv", "parquet")
+PARQUET_COMPRESSION = "zstd"
+
+
+class RateLimiter:
+    """Spaces request starts evenly across all threads sharing the limiter."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
 
 class BaseIngestion:
-    def __init__(self, api_url, api_key, output_dir):
+    def __init__(self, api_url, api_key, output_dir, workers=1,
+                 batch_size=BATCH_SIZE, rate=REQUESTS_PER_SECOND,
+                 response_format=DEFAULT_RESPONSE_FORMAT, storage_format="csv"):
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(f"Unsupported response format: {response_format}")
+
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unsupported storage format: {storage_format}")
+
         self.api_url = api_url
         self.api_key = api_key
         self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.response_format = response_format
+        self.storage_format = storage_format
 
         self.output_dir.mkdir(parents=True ,exist_ok=True)
 
         self.progress_file = self.output_dir / "last_offset.txt"
 
+        # One keep-alive session for every page; the pool is sized so each
+        # worker thread can hold its own connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.workers
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.rate_limiter = RateLimiter(rate)
+
     def load_last_offset(self):
         if self.progress_file.exists():
             return int(self.progress_file.read_text())
@@ -28,25 +95,41 @@ class BaseIngestion:
     def save_offset(self, offset):
         self.progress_file.write_text(str(offset))
 
+    def parse_response(self, response):
+        if self.response_format == "xml":
+            # Parse straight off the socket instead of holding response.text
+            response.raw.decode_content = True
+            return parse_xml_stream(response.raw)
+
+        if self.response_format == "json":
+            return parse_json_page(response.content)
+
+        return parse_csv_page(response.content)
+
     def fetch_page(self, offset):
         params = {
             "api-key": self.api_key,
-            "format": "xml",
+            "format": self.response_format,
             "limit": LIMIT,
             "offset": offset
         }
 
         for attempt in range(1, MAX_RETRIES + 1):
+            self.rate_limiter.wait()
+
             try:
-                response = requests.get(
+                response = self.session.get(
                     self.api_url,
                     params=params,
-                    timeout=(10, 60)
+                    timeout=(10, 60),
+                    stream=True
                 )
-                response.raise_for_status()
-                return ET.fromstring(response.text)
 
-            except (ReadTimeout, ConnectionError):
+                with response:
+                    response.raise_for_status()
+                    return self.parse_response(response)
+
+            except (ReadTimeout, ConnectionError, ChunkedEncodingError, ParseError, json.JSONDecodeError):
                 time.sleep(5 * attempt)
 
             except requests.exceptions.HTTPError as e:
@@ -57,63 +140,151 @@ class BaseIngestion:
 
         raise RuntimeError("API failed after retries")
 
+    def write_page(self, df, batch_offset, page_offset):
+        if self.storage_format == "parquet":
+            self._write_parquet_page(df, page_offset)
+            return
+
+        raw_file = self.output_dir / f"raw_api_offset_{batch_offset}.csv"
+
+        write_header = (
+                not raw_file.exists()
+                or raw_file.stat().st_size == 0
+        )
+
+        df.to_csv(
+            raw_file,
+            mode="a",
+            index=False,
+            header=write_header
+        )
+
+    def _write_parquet_page(self, df, page_offset):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        metadata = dict(table.schema.metadata or {})
+        metadata.update({
+            b"offset_start": str(page_offset).encode(),
+            b"offset_end": str(page_offset + len(df)).encode(),
+            b"row_count": str(len(df)).encode(),
+            b"fetched_at": datetime.now(timezone.utc).isoformat().encode(),
+        })
+        table = table.replace_schema_metadata(metadata)
+
+        # Write then rename, so a crash never leaves a partial page that
+        # the loaders would pick up
+        raw_file = self.output_dir / f"raw_api_offset_{page_offset}.parquet"
+        tmp_file = raw_file.with_suffix(".parquet.tmp")
+
+        pq.write_table(table, tmp_file, compression=PARQUET_COMPRESSION)
+        tmp_file.replace(raw_file)
+
     def ingest_next_batch(self):
         offset = self.load_last_offset()
-        fetched = 0
-
-        raw_file = self.output_dir / f"raw_api_offset_{offset}.csv"
 
         print(f"\n▶ Starting ingestion batch")
         print(f"▶ Resuming from offset: {offset}")
-        print(f"▶ Target batch size: {BATCH_SIZE}\n")
+        print(f"▶ Target batch size: {self.batch_size}")
+        print(f"▶ Workers: {self.workers}")
+        print(f"▶ Storage: {self.storage_format}\n")
 
-        while fetched < BATCH_SIZE:
+        if self.workers > 1:
+            fetched, offset = self._ingest_concurrent(offset)
+        else:
+            fetched, offset = self._ingest_sequential(offset)
+
+        print("\n✔ Batch completed successfully")
+        print(f"✔ Rows fetched in this run: {fetched}")
+        print(f"✔ Saved offset: {offset}\n")
+
+        return fetched
+
+    def _ingest_sequential(self, offset):
+        batch_offset = offset
+        fetched = 0
+
+        while fetched < self.batch_size:
             print(f"📡 Fetching offset {offset} ...")
 
-            root = self.fetch_page(offset)
-            records = root.findall(".//records/item")
+            df = self.fetch_page(offset)
 
-            if not records:
+            if df.empty:
                 print("⛔ No more records returned by API.")
                 break
 
-            rows = [{child.tag: child.text for child in record} for record in records]
-            df = pd.DataFrame(rows)
+            count = self._commit_page(df, batch_offset, fetched, offset)
+            fetched += count
+            offset += count
 
-            remaining = BATCH_SIZE - fetched
-            if len(df) > remaining:
-                df = df.iloc[:remaining]
+        return fetched, offset
 
-            write_header = (
-                    not raw_file.exists()
-                    or raw_file.stat().st_size == 0
-            )
+    def _ingest_concurrent(self, offset):
+        """
+        Fetches a window of page offsets in parallel and commits them in
+        offset order. The saved offset only moves past pages that were
+        written, so a failed or short page stops the window and the next
+        run resumes from the first missing offset.
+        """
+        batch_offset = offset
+        fetched = 0
 
-            df.to_csv(
-                raw_file,
-                mode="a",
-                index=False,
-                header=write_header
-            )
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while fetched < self.batch_size:
+                pages = -(-(self.batch_size - fetched) // LIMIT)
+                window = [
+                    offset + i * LIMIT
+                    for i in range(min(self.workers, pages))
+                ]
 
-            count = len(df)
-            fetched += count
-            offset += count
-            self.save_offset(offset)
+                print(f"📡 Fetching offsets {window[0]}–{window[-1]} ...")
 
-            print(
-                f"✅ Fetched {count} rows | "
-                f"Batch total: {fetched}/{BATCH_SIZE} | "
-                f"Next offset: {offset}"
-            )
+                futures = [executor.submit(self.fetch_page, o) for o in window]
+                done = False
 
-            time.sleep(SLEEP_SECONDS)
+                try:
+                    for future in futures:
+                        df = future.result()
 
-        print("\n✔ Batch completed successfully")
-        print(f"✔ Rows fetched in this run: {fetched}")
-        print(f"✔ Saved offset: {offset}\n")
+                        if df.empty:
+                            print("⛔ No more records returned by API.")
+                            done = True
+                            break
 
-        return fetched
+                        count = self._commit_page(df, batch_offset, fetched, offset)
+                        fetched += count
+                        offset += count
+
+                        # A short page is the end of the data (or a gap the
+                        # next offsets in this window can no longer line up with)
+                        if count < LIMIT or fetched >= self.batch_size:
+                            done = True
+                            break
+                finally:
+                    for future in futures:
+                        future.cancel()
+
+                if done:
+                    break
+
+        return fetched, offset
+
+    def _commit_page(self, df, batch_offset, fetched, offset):
+        remaining = self.batch_size - fetched
+        if len(df) > remaining:
+            df = df.iloc[:remaining]
+
+        self.write_page(df, batch_offset, offset)
+
+        count = len(df)
+        self.save_offset(offset + count)
+
+        print(
+            f"✅ Fetched {count} rows | "
+            f"Batch total: {fetched + count}/{self.batch_size} | "
+            f"Next offset: {offset + count}"
+        )
+
+        return count
 
     def auto_ingest(self):
         while True:
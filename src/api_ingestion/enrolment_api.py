@@ -2,7 +2,7 @@ import os
 from dotenv import load_dotenv
 import argparse
 from pathlib import Path
-from base_ingestion import BaseIngestion
+from base_ingestion import BaseIngestion, MAX_WORKERS, BATCH_SIZE, RESPONSE_FORMATS, DEFAULT_RESPONSE_FORMAT, STORAGE_FORMATS
 
 load_dotenv()
 
@@ -20,13 +20,28 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--next-batch", action="store_true")
     parser.add_argument("--auto", action="store_true")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="?",
+        const=MAX_WORKERS,
+        default=1,
+        help="Fetch pages concurrently with this many workers"
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--format", choices=RESPONSE_FORMATS, default=DEFAULT_RESPONSE_FORMAT)
+    parser.add_argument("--storage", choices=STORAGE_FORMATS, default="csv")
 
     args = parser.parse_args()
 
     ingestor = BaseIngestion(
         api_url=API_URL,
         api_key=API_KEY,
-        output_dir=OUTPUT_DIR
+        output_dir=OUTPUT_DIR,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        response_format=args.format,
+        storage_format=args.storage
     )
 
     if args.auto:
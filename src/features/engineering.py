@@ -0,0 +1,321 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+from processing.chunked import ChunkWriter, iter_chunks
+from processing.incremental import append_csv
+from processing.merge import digest_through, read_date_digests
+from processing.table_io import read_table
+from utils.helpers import log
+from features.temporal import TemporalState
+from features.thresholds import PressureThresholds
+
+REQUIRED_DAILY_COLUMNS = {
+    "demographic_count",
+    "enrolment_count",
+    "biometric_count",
+    "demo_age_5_17",
+    "demo_age_17_",
+    "date"
+}
+
+REQUIRED_MONTHLY_COLUMNS = (REQUIRED_DAILY_COLUMNS - {"date"}) | {"year_month"}
+
+
+def validate_columns(df, required):
+    missing = required - set(df.columns)
+    if missing:
+        raise RuntimeError(f"Missing required columns: {missing}")
+
+
+@dataclass(frozen=True)
+class Ratio:
+    name: str
+    numerator: str
+    denominator: str
+
+
+@dataclass(frozen=True)
+class FeatureSet:
+    """
+    A named, versioned list of ratio features. The version is bumped
+    whenever a definition or the output dtype changes, so anything keyed on
+    it (pipeline step hashes, saved models) knows the features moved.
+    """
+    name: str
+    version: int
+    ratios: tuple
+    dtype: str = "float32"
+
+    @property
+    def key(self):
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def columns(self):
+        return [ratio.name for ratio in self.ratios]
+
+
+FEATURE_SETS = {}
+
+
+def register_feature_set(feature_set):
+    if feature_set.key in FEATURE_SETS:
+        raise RuntimeError(f"Feature set {feature_set.key} is already registered")
+
+    FEATURE_SETS[feature_set.key] = feature_set
+    return feature_set
+
+
+# v1 was the per-script pandas version (float64, one replace/divide/fillna
+# pass per ratio); v2 is the same definitions computed in float32.
+# Uses demographic_count only as the population base.
+DISTRICT_RATIOS = register_feature_set(FeatureSet(
+    name="district_ratios",
+    version=2,
+    ratios=(
+        Ratio("enrolment_pressure", "enrolment_count", "demographic_count"),
+        Ratio("biometric_load_ratio", "biometric_count", "enrolment_count"),
+        Ratio("youth_population_ratio", "demo_age_5_17", "demographic_count"),
+        Ratio("adult_population_ratio", "demo_age_17_", "demographic_count"),
+    ),
+))
+
+
+def _count_values(series):
+    # Plain integer columns are used as they are; anything else (CSV floats,
+    # nullable integers) becomes float64 with missing counts as 0
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iu":
+        return series.to_numpy()
+
+    return series.to_numpy(dtype=np.float64, na_value=0.0)
+
+
+def compute_ratios(df, feature_set=DISTRICT_RATIOS, columns=None):
+    """
+    The ratios of `feature_set` (all, or only `columns`) as {name: array},
+    in one pass over the count columns.
+
+    Each input column is read once and each denominator's non-zero mask is
+    built once. Every ratio is then divided straight into a preallocated
+    zero-filled column; rows with a zero denominator stay 0, as the old
+    replace(0, nan) / fillna(0) did.
+    """
+    values = {}
+    masks = {}
+    out = {}
+
+    for ratio in feature_set.ratios:
+        if columns is not None and ratio.name not in columns:
+            continue
+
+        for col in (ratio.numerator, ratio.denominator):
+            if col not in values:
+                values[col] = _count_values(df[col])
+
+        if ratio.denominator not in masks:
+            masks[ratio.denominator] = values[ratio.denominator] != 0
+
+        column = np.zeros(len(df), dtype=feature_set.dtype)
+        np.divide(
+            values[ratio.numerator],
+            values[ratio.denominator],
+            out=column,
+            where=masks[ratio.denominator],
+            casting="same_kind"
+        )
+        out[ratio.name] = column
+
+    return out
+
+
+def enrolment_pressure(df):
+    return compute_ratios(df, columns=["enrolment_pressure"])["enrolment_pressure"]
+
+
+def add_ratio_features(df, feature_set=DISTRICT_RATIOS):
+    """`df` plus the ratio columns; `df` itself is not modified."""
+    ratios = pd.DataFrame(compute_ratios(df, feature_set), index=df.index, copy=False)
+
+    # concat keeps the new arrays as they are; assign would copy each one
+    return pd.concat(
+        [df.drop(columns=feature_set.columns, errors="ignore"), ratios],
+        axis=1
+    )
+
+
+def _flag_high_pressure(features, thresholds, update):
+    if thresholds is None:
+        thresholds = PressureThresholds()
+
+    if update:
+        thresholds.update(features["enrolment_pressure"], features["state"])
+
+    return (
+        features["enrolment_pressure"] >
+        thresholds.row_thresholds(features["state"])
+    ).astype(int)
+
+
+def build_daily_features(df, thresholds=None, temporal=None, update_thresholds=True):
+    """
+    Ratio, calendar, per-district history and high-pressure features for
+    master_district_daily.
+
+    `thresholds` holds the enrolment-pressure sketches behind
+    high_enrolment_ratio; `df`'s rows are added to it first unless
+    `update_thresholds` is off (chunked runs that sketched the whole table
+    already). Without one the cut-off comes from `df` alone. `temporal`
+    carries each district's recent days between calls (chunks, incremental
+    runs); without one the history is `df` alone.
+    """
+    features = add_ratio_features(df)
+
+    # Temporal features
+    features["date"] = pd.to_datetime(features["date"], errors="coerce")
+    features["day_of_week"] = features["date"].dt.dayofweek
+    features["month"] = features["date"].dt.month
+
+    # Binary signal
+    features["high_enrolment_ratio"] = _flag_high_pressure(features, thresholds, update_thresholds)
+
+    if temporal is None:
+        temporal = TemporalState()
+
+    return temporal.extend(features)
+
+
+def build_daily_features_chunked(master_stem, features_path, budget_mb, thresholds, temporal):
+    """
+    Out-of-core build_daily_features, appending to `features_path` in input
+    order. master_district_daily is sorted by date, so carrying the temporal
+    state from chunk to chunk gives the same history features as one pass.
+    """
+
+    # Pass 1: sketch enrolment pressure for the table-wide thresholds
+    for chunk in iter_chunks(
+        master_stem,
+        budget_mb,
+        columns=["state", "enrolment_count", "demographic_count"]
+    ):
+        thresholds.update(enrolment_pressure(chunk), chunk["state"])
+
+    # Pass 2: features chunk by chunk
+    with ChunkWriter(features_path) as writer:
+        for chunk in iter_chunks(master_stem, budget_mb):
+            validate_columns(chunk, REQUIRED_DAILY_COLUMNS)
+            writer.write(build_daily_features(chunk, thresholds, temporal, update_thresholds=False))
+
+
+def build_daily_features_incremental(master_stem, features_path, thresholds, temporal):
+    """
+    Appends features for the days after `temporal`'s last date, reading
+    only those rows; their pressure is added to the saved sketches before
+    they are flagged. Returns the number of rows appended. The caller
+    checks that the earlier days are unchanged (update_daily_features).
+    """
+    new = read_table(master_stem, filters=[("date", ">", pd.Timestamp(temporal.meta["last_date"]))])
+
+    if new.empty:
+        return 0
+
+    validate_columns(new, REQUIRED_DAILY_COLUMNS)
+
+    features = build_daily_features(new, thresholds, temporal)
+    append_csv(features, features_path)
+
+    return len(new)
+
+
+def _stale_reason(temporal, thresholds, features_path, per_state, digests):
+    # Why the saved state cannot be extended, or None when it can
+    if temporal.empty or thresholds is None or not features_path.exists():
+        return "no saved feature state"
+
+    if temporal.meta.get("feature_set") != DISTRICT_RATIOS.key:
+        return "feature set changed"
+
+    if thresholds.per_state != per_state:
+        return "threshold scope changed"
+
+    if temporal.meta.get("master_digest") != digest_through(digests, temporal.meta["last_date"]):
+        return "earlier days of the merged table changed"
+
+    return None
+
+
+def update_daily_features(
+    master_stem,
+    features_path,
+    state_stem,
+    sketch_path,
+    per_state=False,
+    budget_mb=None,
+    incremental=True,
+    load=read_table
+):
+    """
+    Brings the daily features at `features_path` up to date with
+    master_district_daily and saves the state the next run starts from.
+
+    With `incremental` the saved window state (`state_stem`) and pressure
+    sketches (`sketch_path`) are extended with the new days only, as long
+    as they were built for this feature set and threshold scope and every
+    earlier day of the table still has the digest it had then. Otherwise
+    the features are rebuilt from full history (chunk by chunk under a
+    budget; `load` reads the whole table). Returns the features when they
+    were built in memory, else None.
+    """
+    digests = read_date_digests(master_stem, budget_mb)
+    features = None
+
+    reason = "full rebuild requested"
+    if incremental:
+        temporal = TemporalState.load(state_stem)
+        thresholds = PressureThresholds.load(sketch_path) if sketch_path.exists() else None
+        reason = _stale_reason(temporal, thresholds, features_path, per_state, digests)
+
+    if reason is None:
+        appended = build_daily_features_incremental(master_stem, features_path, thresholds, temporal)
+        log(f"Appended features for {appended} new district-days")
+    else:
+        log(f"Building daily features from full history ({reason})")
+        thresholds = PressureThresholds(per_state=per_state)
+        temporal = TemporalState()
+
+        if budget_mb is not None:
+            build_daily_features_chunked(master_stem, features_path, budget_mb, thresholds, temporal)
+        else:
+            df = load(master_stem)
+            validate_columns(df, REQUIRED_DAILY_COLUMNS)
+
+            features = build_daily_features(df, thresholds, temporal)
+            features.to_csv(features_path, index=False)
+
+    temporal.meta["feature_set"] = DISTRICT_RATIOS.key
+    temporal.meta["master_digest"] = digest_through(digests, temporal.meta.get("last_date"))
+    temporal.save(state_stem)
+    thresholds.save(sketch_path)
+
+    return features
+
+
+def build_monthly_features(df, thresholds=None):
+    """Ratio, calendar and high-pressure features for master_district_monthly."""
+    validate_columns(df, REQUIRED_MONTHLY_COLUMNS)
+
+    features = add_ratio_features(df)
+
+    # Temporal features
+    features["year_month"] = pd.to_datetime(
+        features["year_month"],
+        errors="coerce"
+    )
+
+    features["year"] = features["year_month"].dt.year
+    features["month"] = features["year_month"].dt.month
+
+    # Monthly signal
+    features["high_enrolment_pressure"] = _flag_high_pressure(features, thresholds, update=True)
+
+    return features
@@ -0,0 +1,183 @@
+import json
+import numpy as np
+import pandas as pd
+
+from processing.table_io import read_table, table_exists, write_table
+
+# Per-district history features. Windows count a district's reported days,
+# in date order, not calendar days.
+GROUP_KEYS = ["state", "district"]
+TEMPORAL_SIGNALS = ("enrolment_pressure", "biometric_load_ratio")
+ROLLING_WINDOWS = (7, 28)
+EWMA_SPANS = (7, 28)
+LAG_DAYS = (1, 7)
+
+# Bumped whenever a definition changes; saved state from another version
+# is ignored and the features are rebuilt from full history
+TEMPORAL_VERSION = 1
+
+# Days of history a district needs so every window and lag of its next
+# day sees exactly what a full recompute would
+HISTORY_ROWS = max(max(ROLLING_WINDOWS) - 1, max(LAG_DAYS))
+
+
+def ewma_column(signal, span):
+    return f"{signal}_ewma_{span}"
+
+
+def temporal_columns():
+    columns = []
+    for signal in TEMPORAL_SIGNALS:
+        for window in ROLLING_WINDOWS:
+            columns += [f"{signal}_mean_{window}", f"{signal}_z_{window}"]
+        columns += [ewma_column(signal, span) for span in EWMA_SPANS]
+        columns += [f"{signal}_delta_{lag}" for lag in LAG_DAYS]
+
+    return columns
+
+
+def _realign(grouped_result):
+    # groupby().rolling()/ewm() index by (group, row); rows are 0..n-1
+    return grouped_result.droplevel(0).sort_index().to_numpy()
+
+
+class TemporalState:
+    """
+    What extending the temporal features to later days needs: each
+    district's last HISTORY_ROWS days of every signal (with the EWMAs at
+    those days), plus the row count and last date of the table the state
+    was built from.
+    """
+
+    def __init__(self, tail=None, meta=None):
+        self.tail = tail
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, stem):
+        meta_path = stem.with_suffix(".json")
+
+        if not table_exists(stem) or not meta_path.exists():
+            return cls()
+
+        meta = json.loads(meta_path.read_text())
+        if meta.get("version") != TEMPORAL_VERSION:
+            return cls()
+
+        return cls(read_table(stem), meta)
+
+    @property
+    def empty(self):
+        return self.tail is None or self.tail.empty
+
+    def save(self, stem):
+        write_table(self.tail, stem)
+        stem.with_suffix(".json").write_text(json.dumps(
+            {**self.meta, "version": TEMPORAL_VERSION},
+            indent=2,
+            sort_keys=True
+        ))
+
+    def extend(self, features):
+        """
+        Adds the temporal features of TEMPORAL_SIGNALS to `features` (a
+        frame with the group keys, date and signals, in any row order) and
+        moves the state past its rows. Every district's rows must be later
+        than the days already in the state.
+        """
+        signals = list(TEMPORAL_SIGNALS)
+
+        new = features[[*GROUP_KEYS, "date", *signals]].copy()
+        new["_row"] = np.arange(len(new))
+
+        if self.empty:
+            work = new
+        else:
+            history = self.tail.copy()
+            history["_row"] = -1
+            work = pd.concat([history, new], ignore_index=True)
+
+        group_ids = work.groupby(GROUP_KEYS, sort=False, observed=True).ngroup().to_numpy()
+        order = np.lexsort((work["date"].to_numpy(), group_ids))
+
+        work = work.iloc[order].reset_index(drop=True)
+        group_ids = group_ids[order]
+
+        same_group = group_ids[1:] == group_ids[:-1]
+        dates = work["date"].to_numpy()
+        if np.any(same_group & (dates[1:] <= dates[:-1])):
+            raise RuntimeError(
+                "Temporal features need each district's new days to follow its saved "
+                "history; rebuild them from the full table"
+            )
+
+        is_history = (work["_row"] < 0).to_numpy()
+        # The last history day of each district seeds its EWMAs
+        last_history = is_history & ~np.append(same_group & is_history[1:], False)
+
+        out = {}
+        for signal in signals:
+            values = work[signal].astype(np.float64)
+            grouped = values.groupby(group_ids, sort=False)
+
+            for window in ROLLING_WINDOWS:
+                rolling = grouped.rolling(window, min_periods=1)
+                mean = _realign(rolling.mean())
+                std = _realign(rolling.std())
+
+                z = np.zeros(len(work))
+                np.divide(values.to_numpy() - mean, std, out=z, where=np.nan_to_num(std) > 0)
+
+                out[f"{signal}_mean_{window}"] = mean
+                out[f"{signal}_z_{window}"] = z
+
+            for span in EWMA_SPANS:
+                column = ewma_column(signal, span)
+
+                # History days are masked out except the last one, which
+                # carries the EWMA it ended with (adjust=False starts from
+                # the first observed value)
+                seeded = values.copy()
+                if column in work:
+                    seeded[is_history] = np.nan
+                    seeded[last_history] = work.loc[last_history, column]
+
+                out[column] = _realign(
+                    seeded.groupby(group_ids, sort=False).ewm(span=span, adjust=False).mean()
+                )
+
+            for lag in LAG_DAYS:
+                out[f"{signal}_delta_{lag}"] = (values - grouped.shift(lag)).fillna(0).to_numpy()
+
+        # New state: the last HISTORY_ROWS days of every district seen so far
+        ewma_columns = [ewma_column(s, span) for s in signals for span in EWMA_SPANS]
+        tail = work[[*GROUP_KEYS, "date", *signals]].assign(
+            **{column: out[column] for column in ewma_columns}
+        )
+        keep = pd.Series(group_ids).groupby(group_ids, sort=False).cumcount(ascending=False) < HISTORY_ROWS
+        self.tail = tail[keep.to_numpy()].reset_index(drop=True)
+
+        last_date = features["date"].max()
+        if "last_date" in self.meta:
+            last_date = max(last_date, pd.Timestamp(self.meta["last_date"]))
+
+        self.meta["rows"] = self.meta.get("rows", 0) + len(features)
+        self.meta["last_date"] = last_date.isoformat()
+
+        # Scatter the new rows' values back to the input order
+        new_rows = ~is_history
+        positions = work.loc[new_rows, "_row"].to_numpy()
+
+        columns = {}
+        for name in temporal_columns():
+            column = np.empty(len(features), dtype=np.float32)
+            column[positions] = out[name][new_rows]
+            columns[name] = column
+
+        return pd.concat(
+            [
+                features.drop(columns=list(columns), errors="ignore"),
+                pd.DataFrame(columns, index=features.index, copy=False),
+            ],
+            axis=1
+        )
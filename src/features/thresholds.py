@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+
+# Items kept by the top level of a sketch; rank error is roughly 2 / k
+SKETCH_K = 1024
+
+# Capacity ratio between neighbouring levels (KLL uses 2/3)
+LEVEL_DECAY = 2 / 3
+MIN_LEVEL_CAPACITY = 8
+
+# Districts above this quantile of enrolment pressure are flagged
+HIGH_RATIO_QUANTILE = 0.75
+
+
+class QuantileSketch:
+    """
+    KLL-style mergeable quantile sketch.
+
+    Level h holds items that each stand for 2**h values. A level that
+    outgrows its capacity is sorted and every other item (random offset)
+    moves up a level, so memory stays O(k log(n / k)) however many values
+    are added. Sketches built over different chunks merge by concatenating
+    their levels. Until the first compaction every value is kept and
+    quantiles are exact (numpy's linear interpolation).
+
+    Compaction offsets are seeded from the running count, so feeding the
+    same values in the same order always gives the same sketch.
+    """
+
+    def __init__(self, k=SKETCH_K):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._cdf = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * LEVEL_DECAY ** depth)))
+
+    def _compress(self):
+        rng = np.random.default_rng(self.count)
+
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(items)
+                paired = len(items) - len(items) % 2
+
+                promoted = items[rng.integers(2):paired:2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = items[paired:]
+
+            level += 1
+
+        self._cdf = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+
+        if len(values) == 0:
+            return self
+
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self._compress()
+
+        return self
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def _weighted_cdf(self):
+        if self._cdf is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([
+                np.full(len(level_items), 2.0 ** level)
+                for level, level_items in enumerate(self.levels)
+            ])
+
+            order = np.argsort(items, kind="stable")
+            cumulative = np.cumsum(weights[order])
+            self._cdf = (items[order], cumulative / cumulative[-1])
+
+        return self._cdf
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+
+        items, cdf = self._weighted_cdf()
+        return float(items[min(np.searchsorted(cdf, q), len(items) - 1)])
+
+    def rank(self, value):
+        """Fraction of the values seen that are <= `value`."""
+        if self.count == 0:
+            return np.nan
+
+        if self.exact:
+            return float(np.mean(self.levels[0] <= value))
+
+        items, cdf = self._weighted_cdf()
+        position = np.searchsorted(items, value, side="right")
+        return float(cdf[position - 1]) if position > 0 else 0.0
+
+    def to_arrays(self):
+        return [level.copy() for level in self.levels]
+
+    @classmethod
+    def from_arrays(cls, levels, k=SKETCH_K):
+        sketch = cls(k)
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in levels] or [np.empty(0)]
+        sketch.count = int(sum(len(level) * 2 ** h for h, level in enumerate(sketch.levels)))
+        return sketch
+
+
+class PressureThresholds:
+    """
+    Enrolment-pressure sketches for one table: one over every row and,
+    with `per_state`, one per state. Thresholds are cached per sketch and
+    only recomputed after an update, so flagging a row is a lookup.
+    """
+
+    def __init__(self, per_state=False, quantile=HIGH_RATIO_QUANTILE, k=SKETCH_K):
+        self.per_state = per_state
+        self.q = quantile
+        self.k = k
+        self.overall = QuantileSketch(k)
+        self.states = {}
+        self._cache = {}
+
+    def update(self, pressure, states=None):
+        pressure = np.asarray(pressure, dtype=np.float64)
+        self.overall.update(pressure)
+
+        if self.per_state:
+            codes, states = pd.factorize(states)
+
+            # One sort groups every state's rows; rows without a state (-1) come first
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(states) + 1))
+
+            for code, state in enumerate(states):
+                sketch = self.states.setdefault(str(state), QuantileSketch(self.k))
+                sketch.update(pressure[order[bounds[code]:bounds[code + 1]]])
+
+        self._cache = {}
+        return self
+
+    def merge(self, other):
+        self.overall.merge(other.overall)
+
+        for state, sketch in other.states.items():
+            self.states.setdefault(state, QuantileSketch(self.k)).merge(sketch)
+
+        self._cache = {}
+        return self
+
+    def threshold(self, state=None):
+        key = str(state) if self.per_state and state is not None and str(state) in self.states else None
+
+        if key not in self._cache:
+            sketch = self.overall if key is None else self.states[key]
+            self._cache[key] = sketch.quantile(self.q)
+
+        return self._cache[key]
+
+    def row_thresholds(self, states):
+        if not self.per_state:
+            return self.threshold()
+
+        codes, uniques = pd.factorize(states)
+        values = np.array([self.threshold(state) for state in uniques] + [self.threshold()])
+
+        # Rows without a state (code -1) take the overall threshold
+        return values[codes]
+
+    def save(self, path):
+        arrays = {
+            "per_state": np.array(self.per_state),
+            "quantile": np.array(self.q),
+            "k": np.array(self.k),
+            "states": np.array(list(self.states), dtype=str),
+        }
+
+        sketches = [self.overall, *self.states.values()]
+        for i, sketch in enumerate(sketches):
+            for level, items in enumerate(sketch.to_arrays()):
+                arrays[f"s{i}_l{level}"] = items
+
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            thresholds = cls(
+                per_state=bool(arrays["per_state"]),
+                quantile=float(arrays["quantile"]),
+                k=int(arrays["k"])
+            )
+
+            def sketch_levels(i):
+                levels = []
+                while f"s{i}_l{len(levels)}" in arrays:
+                    levels.append(arrays[f"s{i}_l{len(levels)}"])
+                return levels
+
+            thresholds.overall = QuantileSketch.from_arrays(sketch_levels(0), thresholds.k)
+            for i, state in enumerate(arrays["states"], start=1):
+                thresholds.states[str(state)] = QuantileSketch.from_arrays(sketch_levels(i), thresholds.k)
+
+        return thresholds
@@ -0,0 +1,173 @@
+import hashlib
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from processing.chunked import ChunkWriter, count_rows, iter_chunks, rows_per_chunk
+from modeling.registry import ModelRegistry, save_artifacts
+from processing.table_io import write_table
+
+FEATURE_COLS = [
+    "enrolment_pressure",
+    "biometric_load_ratio",
+    "youth_population_ratio",
+    "adult_population_ratio",
+    # Change against the district's own recent history
+    "enrolment_pressure_z_28",
+    "biometric_load_ratio_z_28",
+    "enrolment_pressure_delta_7"
+]
+
+# The monthly table has the ratios but no per-district history features
+MONTHLY_FEATURE_COLS = FEATURE_COLS[:4]
+
+N_ESTIMATORS = 200
+CONTAMINATION = 0.05
+RANDOM_STATE = 42
+
+# Scoring splits rows into blocks scored on this many threads (-1: every
+# core); tree traversal releases the GIL, so threads scale without copying
+# the forest into worker processes
+N_JOBS = -1
+SCORE_BLOCK_ROWS = 65_536
+
+# Results hold the continuous decision_function score (float32, below 0 is
+# anomalous) rather than the -1/1 prediction; bumped when the columns change
+RESULTS_VERSION = 2
+
+# Registry names (models/registry/<name>/)
+DAILY_MODEL = "daily"
+MONTHLY_MODEL = "monthly"
+
+
+def validate_features(df, feature_cols=FEATURE_COLS):
+    missing = set(feature_cols) - set(df.columns)
+    if missing:
+        raise RuntimeError(f"Missing required feature columns: {missing}")
+
+
+def build_model(n_jobs=N_JOBS):
+    return IsolationForest(
+        n_estimators=N_ESTIMATORS,
+        contamination=CONTAMINATION,
+        random_state=RANDOM_STATE,
+        n_jobs=n_jobs
+    )
+
+
+def score_rows(model, X, n_jobs=N_JOBS):
+    """decision_function of every row as float32, scored block-parallel."""
+    X = np.asarray(X, dtype=np.float32)
+    blocks = [X[start:start + SCORE_BLOCK_ROWS] for start in range(0, len(X), SCORE_BLOCK_ROWS)]
+
+    if len(blocks) <= 1:
+        return model.decision_function(X).astype(np.float32)
+
+    scores = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(model.decision_function)(block) for block in blocks
+    )
+    return np.concatenate(scores).astype(np.float32)
+
+
+def label_rows(df, scores):
+    # New frame: the features may still be shared with other pipeline steps.
+    # Same cut-off as IsolationForest.predict
+    return df.assign(
+        anomaly_score=scores,
+        is_anomaly=(scores < 0).astype(int)
+    )
+
+
+def fit_predict(df, n_jobs=N_JOBS, feature_cols=FEATURE_COLS):
+    """Scales the features, fits the Isolation Forest on every row and scores them."""
+    validate_features(df, feature_cols)
+
+    # Scale features (robust to outliers)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(df[feature_cols])
+
+    model = build_model(n_jobs).fit(X_scaled)
+    df = label_rows(df, score_rows(model, X_scaled, n_jobs))
+
+    return df, model, scaler
+
+
+def fit_predict_chunked(feature_stem, results_path, budget_mb, n_jobs=N_JOBS):
+    """
+    Out-of-core equivalent of fit_predict.
+
+    Pass 1 fits the scaler with partial_fit (exact mean/variance) and keeps
+    a uniform row sample no larger than one chunk. The forest is fitted on
+    that sample: each tree only ever sees a 256-row subsample, so this
+    changes which rows are drawn, not what the model can learn, but labels
+    are not bit-identical to the in-memory path. Pass 2 scores and writes
+    every chunk.
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    scaler = StandardScaler()
+
+    total_rows = count_rows(feature_stem)
+    sample_rows = rows_per_chunk(len(FEATURE_COLS) * 8, budget_mb)
+    fraction = min(1.0, sample_rows / max(total_rows, 1))
+
+    samples = []
+    for chunk in iter_chunks(feature_stem, budget_mb, columns=FEATURE_COLS):
+        validate_features(chunk)
+        X = chunk[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+        scaler.partial_fit(X)
+        samples.append(X[rng.random(len(X)) < fraction])
+
+    model = build_model(n_jobs)
+    model.fit(scaler.transform(np.concatenate(samples)))
+    del samples
+
+    with ChunkWriter(results_path) as writer:
+        for chunk in iter_chunks(feature_stem, budget_mb):
+            X_scaled = scaler.transform(chunk[FEATURE_COLS].to_numpy(dtype=np.float64))
+            writer.write(label_rows(chunk, score_rows(model, X_scaled, n_jobs)))
+
+    return model, scaler
+
+
+def frame_hash(df, columns):
+    """Content hash of the training rows, recorded with a registered model."""
+    return hashlib.blake2b(
+        pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes(),
+        digest_size=16
+    ).hexdigest()
+
+
+def train_monthly(df, results_stem, model_dir, n_jobs=N_JOBS):
+    """
+    Monthly counterpart of the daily model: the same scaler and forest over
+    MONTHLY_FEATURE_COLS, registered as the current "monthly" model, with the
+    results written as a Parquet table (dictionary-encoded geography, typed
+    months) so readers can load only the columns and rows they need.
+    """
+    registry = ModelRegistry(model_dir, MONTHLY_MODEL)
+    data_hash = frame_hash(df, ["year_month", "state", "district", *MONTHLY_FEATURE_COLS])
+
+    df, model, scaler = fit_predict(df, n_jobs, MONTHLY_FEATURE_COLS)
+
+    df = df.assign(
+        year_month=pd.to_datetime(df["year_month"]),
+        state=df["state"].astype("category"),
+        district=df["district"].astype("category")
+    )
+    write_table(df, results_stem)
+
+    version, path = registry.new_version(data_hash)
+    save_artifacts(model, scaler, path)
+    registry.publish(version, {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "rows": len(df),
+        "feature_cols": MONTHLY_FEATURE_COLS,
+        "training_data_hash": data_hash,
+        "results_version": RESULTS_VERSION,
+    })
+
+    return df
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+from sklearn.tree._tree import TREE_LEAF
+
+from modeling.anomaly import DAILY_MODEL, FEATURE_COLS
+from modeling.partitioned import PARTITION_DIR, PartitionedModel
+from modeling.registry import ModelRegistry, load_artifacts
+from processing.chunked import ChunkWriter, iter_chunks
+from utils.helpers import log
+
+KEY_COLUMNS = ["date", "state", "district"]
+
+# One column per feature: its share of anomaly_score - expected_score (the
+# score of a row that follows the training data's average path). Negative
+# contributions push a row towards anomalous; they sum to the difference.
+CONTRIBUTION_SUFFIX = "_contribution"
+CONTRIBUTION_COLS = [f"{col}{CONTRIBUTION_SUFFIX}" for col in FEATURE_COLS]
+EXPLANATION_COLUMNS = [*KEY_COLUMNS, "anomaly_score", "expected_score", *CONTRIBUTION_COLS]
+
+
+class ForestExplainer:
+    """
+    Per-feature attribution of Isolation Forest scores, path-based like
+    Saabas attributions for regression trees: a node's expected path length
+    is the mean over the training samples under it, and each split on a
+    row's path credits its feature with the change in expected path length.
+
+    The credits are summed once per node from the root down, so explaining
+    rows is one apply() per tree, as scoring is, plus a row lookup. The
+    path-length credits are converted to score units with each row's secant
+    of the score function, so they add up to the row's score exactly.
+    """
+
+    def __init__(self, forest):
+        self.forest = forest
+        info = forest.info
+
+        nodes = np.asarray(forest.arrays["nodes"])
+        counts = np.asarray(info["node_counts"])
+        tree_ids = np.repeat(np.arange(len(counts)), counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+
+        internal = nodes["left_child"] != TREE_LEAF
+        left = np.where(internal, nodes["left_child"] + starts, -1)
+        right = np.where(internal, nodes["right_child"] + starts, -1)
+        samples = nodes["n_node_samples"].astype(np.float64)
+        depths = np.concatenate([tree.compute_node_depths() for tree, _ in forest.trees()])
+
+        features = nodes["feature"].astype(np.intp)
+        if info["tree_features"] != info["n_features"]:
+            features = np.where(internal, np.asarray(forest.arrays["features"])[tree_ids, features], -1)
+
+        # Expected path length under each node, from the leaves up
+        expected = np.array(forest.arrays["leaf_values"], dtype=np.float64)
+        for depth in range(int(depths.max()) - 1, 0, -1):
+            split = np.flatnonzero(internal & (depths == depth))
+            lo, hi = left[split], right[split]
+            expected[split] = (
+                (samples[lo] * expected[lo] + samples[hi] * expected[hi])
+                / (samples[lo] + samples[hi])
+            )
+
+        # Credit per feature accumulated from the root to each node
+        credits = np.zeros((len(nodes), info["n_features"]))
+        for depth in range(1, int(depths.max())):
+            split = np.flatnonzero(internal & (depths == depth))
+
+            for children in (left[split], right[split]):
+                credits[children] = credits[split]
+                credits[children, features[split]] += expected[children] - expected[split]
+
+        self.credits = credits
+        self.root_length = float(expected[depths == 1].sum())
+
+    def score_from_length(self, lengths):
+        """IsolationForest decision_function of a summed path length."""
+        return -(2 ** -(lengths / self.forest.info["denominator"])) - self.forest.info["offset"]
+
+    def explain(self, X):
+        """
+        (contributions, expected score) for the scaled rows `X`;
+        contributions has one column per feature, in score units.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        subsample = self.forest.info["tree_features"] != self.forest.info["n_features"]
+
+        credits = np.zeros((len(X), self.credits.shape[1]))
+        for (tree, start), features in zip(self.forest.trees(), self.forest.arrays["features"]):
+            credits += self.credits[start + tree.apply(X[:, features] if subsample else X)]
+
+        expected = self.score_from_length(self.root_length)
+        delta = credits.sum(axis=1)
+        lengths = self.root_length + delta
+
+        # Secant of the score between the expected and the row's path length;
+        # its derivative where the two coincide
+        derivative = np.log(2) / self.forest.info["denominator"] * 2 ** -(lengths / self.forest.info["denominator"])
+        flat = np.abs(delta) < 1e-9
+        slope = np.where(flat, derivative, (self.score_from_length(lengths) - expected) / np.where(flat, 1.0, delta))
+
+        return (credits * slope[:, None]).astype(np.float32), expected
+
+
+def load_explainer(model_dir, partition=None):
+    """df -> (contributions, expected scores) from the current daily model."""
+    path = ModelRegistry(model_dir, DAILY_MODEL).path()
+
+    if partition is None:
+        forest, scaler = load_artifacts(path)
+        explainer = ForestExplainer(forest)
+
+        def explain(df):
+            contributions, expected = explainer.explain(scaler.transform(df[FEATURE_COLS]))
+            return contributions, np.full(len(df), expected, dtype=np.float32)
+
+        return explain
+
+    router = PartitionedModel.load(path / PARTITION_DIR)
+    explainers = {}
+
+    def explain(df):
+        codes, keys = pd.factorize(router.route(df))
+        X = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+        contributions = np.empty((len(df), len(FEATURE_COLS)), dtype=np.float32)
+        expected = np.empty(len(df), dtype=np.float32)
+        for code, key in enumerate(keys):
+            rows = codes == code
+            forest, scaler = router.artifacts(key)
+
+            if key not in explainers:
+                explainers[key] = ForestExplainer(forest)
+
+            contributions[rows], expected[rows] = explainers[key].explain(scaler.transform(X[rows]))
+
+        return contributions, expected
+
+    return explain
+
+
+def explain_anomalies(explain, results):
+    """Explanation rows for the anomalous rows of scored `results`."""
+    anomalies = results[results["is_anomaly"] == 1]
+
+    if anomalies.empty:
+        return pd.DataFrame(columns=EXPLANATION_COLUMNS)
+
+    contributions, expected = explain(anomalies)
+
+    explanations = anomalies[[*KEY_COLUMNS, "anomaly_score"]].reset_index(drop=True)
+    explanations["expected_score"] = expected
+    explanations[CONTRIBUTION_COLS] = contributions
+
+    return explanations
+
+
+def write_explanations(results_path, explanations_path, model_dir, budget_mb, partition=None):
+    """Explains every anomalous row of the results with the current model."""
+    explain = load_explainer(model_dir, partition)
+    rows = 0
+
+    with ChunkWriter(explanations_path) as writer:
+        for chunk in iter_chunks(results_path.with_suffix(""), budget_mb):
+            explanations = explain_anomalies(explain, chunk)
+            writer.write(explanations)
+            rows += len(explanations)
+
+    log(f"Explained {rows} anomalous rows")
@@ -0,0 +1,275 @@
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from features.engineering import DISTRICT_RATIOS, compute_ratios
+from features.temporal import TEMPORAL_SIGNALS
+from processing.chunked import iter_chunks
+from processing.incremental import append_csv
+from processing.merge import first_changed_date, read_date_digests
+from processing.table_io import read_table
+from utils.helpers import log
+
+# Online detection: each district keeps its last WINDOW_DAYS reported days
+# of every signal, and a new day is scored with a robust z-score (median and
+# MAD of that window) before it joins the window. State is bounded at
+# WINDOW_DAYS values per signal per district however long the stream runs.
+ONLINE_SIGNALS = TEMPORAL_SIGNALS
+WINDOW_DAYS = 28
+MIN_HISTORY_DAYS = 7
+Z_THRESHOLD = 3.5
+
+# MAD of a normal distribution is 0.6745 sigma
+MAD_SCALE = 1.4826
+
+# A district whose window is (nearly) constant would turn any change into a
+# huge z; its scale is floored at this fraction of the window median
+MIN_RELATIVE_SCALE = 0.05
+MIN_SCALE = 1e-6
+
+# Bumped whenever the state layout or a definition changes
+ONLINE_VERSION = 2
+
+# Columns an update reads
+ONLINE_COLUMNS = ["date", "state", "district", *dict.fromkeys(
+    col
+    for ratio in DISTRICT_RATIOS.ratios if ratio.name in ONLINE_SIGNALS
+    for col in (ratio.numerator, ratio.denominator)
+)]
+
+ALERT_COLUMNS = ["date", "state", "district", "signal", "value", "baseline", "z", "detected_at"]
+
+
+class OnlineDetector:
+    """
+    Per-district robust z-score detector for rows arriving in batches.
+
+    Rows are processed per district in date order; a district's rows dated
+    on or before the last day it has seen are skipped, so feeding the same
+    table again only scores its new days. Within a batch the k-th new day
+    of every district is scored together, so one new day for every
+    district is a single vectorized step.
+
+    `digests` are the merged table's per-date digests when the detector
+    last caught up with it, so a revised day it has already seen is noticed.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=object)
+        self.window = np.full((0, len(ONLINE_SIGNALS), WINDOW_DAYS), np.nan)
+        self.seen = np.zeros(0, dtype=np.int64)
+        self.last_date = np.full(0, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.digests = pd.Series(np.zeros(0, dtype=np.uint64), index=pd.DatetimeIndex([]))
+        self._ids = {}
+
+    @classmethod
+    def load(cls, path):
+        detector = cls()
+
+        if not path.exists():
+            return detector
+
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays["version"]) != ONLINE_VERSION or arrays["window"].shape[2] != WINDOW_DAYS:
+                return detector
+
+            detector.keys = arrays["keys"].astype(object)
+            detector.window = arrays["window"]
+            detector.seen = arrays["seen"]
+            detector.last_date = arrays["last_date"]
+            detector.digests = pd.Series(arrays["digests"], index=pd.DatetimeIndex(arrays["digest_dates"]))
+
+        detector._ids = {key: i for i, key in enumerate(detector.keys)}
+        return detector
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(ONLINE_VERSION),
+                keys=self.keys.astype(str),
+                window=self.window,
+                seen=self.seen,
+                last_date=self.last_date,
+                digest_dates=self.digests.index.to_numpy(dtype="datetime64[D]"),
+                digests=self.digests.to_numpy()
+            )
+
+    @property
+    def through(self):
+        """The latest day any district has seen, or None for a fresh detector."""
+        latest = pd.Series(self.last_date).max()
+        return None if pd.isna(latest) else latest
+
+    def _district_ids(self, keys):
+        new = [key for key in pd.unique(keys) if key not in self._ids]
+
+        if new:
+            for key in new:
+                self._ids[key] = len(self._ids)
+
+            self.keys = np.concatenate([self.keys, np.array(new, dtype=object)])
+            self.window = np.concatenate([
+                self.window,
+                np.full((len(new), len(ONLINE_SIGNALS), WINDOW_DAYS), np.nan)
+            ])
+            self.seen = np.concatenate([self.seen, np.zeros(len(new), dtype=np.int64)])
+            self.last_date = np.concatenate([
+                self.last_date,
+                np.full(len(new), np.datetime64("NaT"), dtype="datetime64[ns]")
+            ])
+
+        return np.array([self._ids[key] for key in keys], dtype=np.int64)
+
+    def update(self, df):
+        """
+        Scores the new days of `df` (state, district, date and the count
+        columns behind ONLINE_SIGNALS) and adds them to the windows.
+        Returns one alert row per (day, signal) beyond Z_THRESHOLD.
+        """
+        if df.empty:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+
+        dates = pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[ns]")
+        ids = self._district_ids((df["state"].astype(str) + "|" + df["district"].astype(str)).to_numpy())
+
+        ratios = compute_ratios(df, columns=ONLINE_SIGNALS)
+        values = np.column_stack([ratios[signal] for signal in ONLINE_SIGNALS]).astype(np.float64)
+
+        # Days a district has already seen (NaT compares False: all new)
+        fresh = ~(dates <= self.last_date[ids])
+        rows = np.flatnonzero(fresh)
+        rows = rows[np.lexsort((dates[rows], ids[rows]))]
+
+        # k-th new day of each district
+        starts = np.flatnonzero(np.append(True, ids[rows][1:] != ids[rows][:-1]))
+        rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.append(starts, len(rows))))
+
+        alerts = []
+        for k in range(int(rank.max()) + 1 if len(rows) else 0):
+            batch = rows[rank == k]
+            alerts.append(self._step(ids[batch], values[batch], batch))
+
+        if len(rows):
+            latest = pd.Series(dates[rows]).groupby(ids[rows]).max()
+            self.last_date[latest.index.to_numpy()] = latest.to_numpy()
+
+        if not alerts:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+
+        positions, signals, z, baseline = (np.concatenate(parts) for parts in zip(*alerts))
+        return pd.DataFrame({
+            "date": dates[positions],
+            "state": df["state"].to_numpy()[positions],
+            "district": df["district"].to_numpy()[positions],
+            "signal": np.array(ONLINE_SIGNALS)[signals],
+            "value": values[positions, signals],
+            "baseline": baseline,
+            "z": z,
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    def _step(self, ids, values, positions):
+        """Scores one new day for each of `ids` (distinct districts), then stores it."""
+        ready = self.seen[ids] >= MIN_HISTORY_DAYS
+        z = np.full(values.shape, np.nan)
+        median = np.full(values.shape, np.nan)
+
+        if ready.any():
+            window = self.window[ids[ready]]
+            median[ready] = np.nanmedian(window, axis=2)
+            mad = np.nanmedian(np.abs(window - median[ready][:, :, None]), axis=2)
+
+            scale = np.maximum(MAD_SCALE * mad, MIN_RELATIVE_SCALE * np.abs(median[ready]))
+            z[ready] = (values[ready] - median[ready]) / np.maximum(scale, MIN_SCALE)
+
+        slot = self.seen[ids] % WINDOW_DAYS
+        self.window[ids, :, slot] = values
+        self.seen[ids] += 1
+
+        flagged_rows, flagged_signals = np.nonzero(np.abs(np.nan_to_num(z)) > Z_THRESHOLD)
+        return (
+            positions[flagged_rows],
+            flagged_signals,
+            z[flagged_rows, flagged_signals],
+            median[flagged_rows, flagged_signals],
+        )
+
+
+def _read_master(master_stem, budget_mb, start=None, end=None):
+    """ONLINE_COLUMNS of the merged rows dated in [start, end), either bound open."""
+    if budget_mb is None:
+        filters = [bound for bound in (("date", ">=", start), ("date", "<", end)) if bound[2] is not None]
+        yield read_table(master_stem, columns=ONLINE_COLUMNS, filters=filters or None)
+        return
+
+    for chunk in iter_chunks(master_stem, budget_mb, columns=ONLINE_COLUMNS):
+        if start is not None:
+            chunk = chunk[chunk["date"] >= start]
+        if end is not None:
+            chunk = chunk[chunk["date"] < end]
+        yield chunk
+
+
+def _drop_alerts(alerts_path, start):
+    if alerts_path.exists():
+        alerts = pd.read_csv(alerts_path, parse_dates=["date"])
+        alerts[alerts["date"] < start].to_csv(alerts_path, index=False)
+
+
+def update_alerts(master_stem, state_path, alerts_path, budget_mb=None):
+    """
+    Brings the alerts at `alerts_path` up to date with the merged table.
+
+    Usually only the rows dated after the last day the saved detector has
+    seen are read and scored. When the table's per-date digests show that
+    a day it has already seen was revised (a late batch), the detector is
+    rebuilt from the days before that one without alerting, and every day
+    from it on is checked again, replacing its earlier alerts. Returns the
+    new alerts.
+    """
+    digests = read_date_digests(master_stem, budget_mb)
+    detector = OnlineDetector.load(state_path)
+    through = detector.through
+
+    if through is None:
+        alerts_path.unlink(missing_ok=True)
+        frames = _read_master(master_stem, budget_mb)
+    else:
+        seen = detector.digests
+        changed = first_changed_date(seen[seen.index <= through], digests[digests.index <= through])
+
+        if changed is None:
+            frames = [read_table(master_stem, columns=ONLINE_COLUMNS, filters=[("date", ">", through)])]
+        else:
+            log(f"Merged days from {changed:%Y-%m-%d} were revised; re-checking them")
+
+            detector = OnlineDetector()
+            for df in _read_master(master_stem, budget_mb, end=changed):
+                detector.update(df)
+
+            _drop_alerts(alerts_path, changed)
+            frames = _read_master(master_stem, budget_mb, start=changed)
+
+    alerts = []
+    rows = 0
+    elapsed = 0.0
+    for df in frames:
+        start = time.perf_counter()
+        found = detector.update(df)
+        if not found.empty:
+            alerts.append(found)
+        elapsed += time.perf_counter() - start
+        rows += len(df)
+
+    alerts = pd.concat(alerts, ignore_index=True) if alerts else pd.DataFrame(columns=ALERT_COLUMNS)
+
+    if not alerts.empty:
+        append_csv(alerts, alerts_path)
+
+    detector.digests = digests
+    detector.save(state_path)
+
+    log(f"Online detector: {len(alerts)} alerts from {rows} rows in {elapsed * 1000:.1f} ms")
+    return alerts
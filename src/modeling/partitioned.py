@@ -0,0 +1,193 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from joblib import effective_n_jobs
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from modeling.anomaly import (
+    FEATURE_COLS,
+    N_JOBS,
+    RANDOM_STATE,
+    build_model,
+    label_rows,
+    score_rows,
+    validate_features,
+)
+from modeling.registry import load_artifacts, save_artifacts
+from processing.chunked import ChunkWriter, count_rows, iter_chunks, rows_per_chunk
+from utils.helpers import log
+
+# One Isolation Forest per state, or per cluster of similar districts, so a
+# small district is judged against its peers rather than the metros
+PARTITIONS = ("state", "cluster")
+PARTITION_DIR = "partitions"
+INDEX_FILE = "index.json"
+
+# Rows of partitions smaller than one forest subsample, and rows of states
+# or districts never seen in training, go to the model fitted on every row
+MIN_PARTITION_ROWS = 256
+FALLBACK_KEY = "all"
+
+# Districts are clustered on their size (log mean counts) and their typical
+# ratios
+N_CLUSTERS = 8
+CLUSTER_COUNT_COLUMNS = ["demographic_count", "enrolment_count", "biometric_count"]
+CLUSTER_RATIO_COLUMNS = FEATURE_COLS[:4]
+
+
+def _district_keys(df):
+    return df["state"].astype(str) + "|" + df["district"].astype(str)
+
+
+def cluster_districts(df):
+    """{"state|district": cluster id} from each district's profile."""
+    profile = (
+        df.assign(_district=_district_keys(df))
+        .groupby("_district")
+        .agg({
+            **{col: "mean" for col in CLUSTER_COUNT_COLUMNS},
+            **{col: "median" for col in CLUSTER_RATIO_COLUMNS},
+        })
+    )
+    profile[CLUSTER_COUNT_COLUMNS] = np.log1p(profile[CLUSTER_COUNT_COLUMNS])
+
+    kmeans = KMeans(
+        n_clusters=min(N_CLUSTERS, len(profile)),
+        n_init=10,
+        random_state=RANDOM_STATE
+    )
+    labels = kmeans.fit_predict(StandardScaler().fit_transform(profile.fillna(0)))
+
+    return {district: f"cluster_{label}" for district, label in zip(profile.index, labels)}
+
+
+def partition_keys(df, partition, clusters=None):
+    if partition == "state":
+        return df["state"].astype(str).to_numpy()
+
+    return _district_keys(df).map(clusters).fillna(FALLBACK_KEY).to_numpy()
+
+
+def _fit_partition(X):
+    # Runs in a worker process; the pool already uses every core
+    scaler = StandardScaler()
+    model = build_model(n_jobs=1).fit(scaler.fit_transform(X))
+    return model, scaler
+
+
+def _artifact_dir(position):
+    return f"partition_{position:04d}"
+
+
+class PartitionedModel:
+    """
+    Keyed set of per-partition (forest, scaler) artifacts under one
+    registered model version. Only the index is read up front; a
+    partition's arrays are memory-mapped the first time a row is routed
+    to it.
+    """
+
+    def __init__(self, directory, index):
+        self.directory = directory
+        self.partition = index["partition"]
+        self.clusters = index.get("clusters")
+        self.files = index["models"]
+        self._loaded = {}
+
+    @classmethod
+    def load(cls, directory):
+        return cls(directory, json.loads((directory / INDEX_FILE).read_text()))
+
+    def artifacts(self, key):
+        if key not in self._loaded:
+            self._loaded[key] = load_artifacts(self.directory / self.files[key])
+
+        return self._loaded[key]
+
+    def route(self, df):
+        keys = partition_keys(df, self.partition, self.clusters)
+        return np.where(np.isin(keys, list(self.files)), keys, FALLBACK_KEY)
+
+    def score(self, df, n_jobs=N_JOBS):
+        codes, keys = pd.factorize(self.route(df))
+        X = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+        scores = np.empty(len(df), dtype=np.float32)
+        for code, key in enumerate(keys):
+            rows = codes == code
+            model, scaler = self.artifacts(key)
+            scores[rows] = score_rows(model, scaler.transform(X[rows]), n_jobs)
+
+        return scores
+
+
+def fit_partitioned(df, partition, directory, n_jobs=N_JOBS):
+    """
+    Fits one model per partition of `df` (and the fallback model over every
+    row) in a process pool and writes them to `directory`.
+    """
+    validate_features(df)
+
+    clusters = cluster_districts(df) if partition == "cluster" else None
+    keys = partition_keys(df, partition, clusters)
+    X = df[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+    codes, uniques = pd.factorize(keys)
+    sizes = np.bincount(codes, minlength=len(uniques))
+
+    jobs = {FALLBACK_KEY: X}
+    for code, key in enumerate(uniques):
+        if sizes[code] >= MIN_PARTITION_ROWS and key != FALLBACK_KEY:
+            jobs[key] = X[codes == code]
+
+    directory.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    with ProcessPoolExecutor(min(effective_n_jobs(n_jobs), len(jobs))) as pool:
+        fitted = pool.map(_fit_partition, jobs.values())
+
+        for position, (key, artifacts) in enumerate(zip(jobs, fitted)):
+            files[key] = _artifact_dir(position)
+            save_artifacts(*artifacts, directory / files[key])
+
+    index = {"partition": partition, "clusters": clusters, "models": files}
+    (directory / INDEX_FILE).write_text(json.dumps(index, indent=2))
+
+    log(f"Fitted {len(files) - 1} {partition} models (+ fallback on {len(X)} rows)")
+    return PartitionedModel(directory, index)
+
+
+def fit_predict_partitioned(df, partition, directory, n_jobs=N_JOBS):
+    model = fit_partitioned(df, partition, directory, n_jobs)
+    return label_rows(df, model.score(df, n_jobs)), model
+
+
+def fit_predict_partitioned_chunked(feature_stem, results_path, budget_mb, partition, directory, n_jobs=N_JOBS):
+    """
+    Out-of-core equivalent of fit_predict_partitioned: the partitions are
+    fitted on a uniform row sample no larger than one chunk (each scaler
+    on its partition's sampled rows), then every chunk is routed and scored.
+    """
+    rng = np.random.default_rng(RANDOM_STATE)
+    columns = ["state", "district", *FEATURE_COLS]
+    if partition == "cluster":
+        columns += CLUSTER_COUNT_COLUMNS
+
+    total_rows = count_rows(feature_stem)
+    sample_rows = rows_per_chunk(len(columns) * 8, budget_mb)
+    fraction = min(1.0, sample_rows / max(total_rows, 1))
+
+    samples = [
+        chunk[rng.random(len(chunk)) < fraction]
+        for chunk in iter_chunks(feature_stem, budget_mb, columns=columns)
+    ]
+    model = fit_partitioned(pd.concat(samples, ignore_index=True), partition, directory, n_jobs)
+    del samples
+
+    with ChunkWriter(results_path) as writer:
+        for chunk in iter_chunks(feature_stem, budget_mb):
+            writer.write(label_rows(chunk, model.score(chunk, n_jobs)))
+
+    return model
@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import numpy as np
+import sklearn
+from sklearn.tree._tree import NODE_DTYPE, Tree
+
+# models/registry/<name>/<version>/ holds one trained model with its scaler
+# and manifest; <name>/CURRENT names the version scoring and the dashboard use
+REGISTRY_DIR = "registry"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+FOREST_FILE = "forest.json"
+
+# Versions kept besides the current one
+KEEP_VERSIONS = 5
+
+
+def average_path_length(n_samples):
+    """Expected isolation depth of n samples (same formula as scikit-learn)."""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    lengths = np.zeros(n_samples.shape)
+
+    lengths[n_samples == 2] = 1.0
+    many = n_samples > 2
+    lengths[many] = (
+        2.0 * (np.log(n_samples[many] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[many] - 1.0) / n_samples[many]
+    )
+
+    return lengths
+
+
+def _node_fields_match(dtype):
+    # Field names and types only: saved node arrays drop the struct padding
+    expected = np.dtype(NODE_DTYPE)
+    return dtype.names == expected.names and all(
+        dtype.fields[name][0] == expected.fields[name][0] for name in expected.names
+    )
+
+
+class ForestArrays:
+    """
+    A fitted IsolationForest as flat arrays: every tree's nodes and values
+    concatenated, plus each node's path-length contribution. Saved as
+    uncompressed .npy files that load memory-mapped; only the Tree objects
+    whose compiled apply() does the traversal are rebuilt, so loading takes
+    milliseconds and scores are bit-identical to decision_function.
+    """
+
+    ARRAYS = ("nodes", "values", "leaf_values", "features")
+
+    def __init__(self, arrays, info):
+        self.arrays = arrays
+        self.info = info
+        self._trees = None
+
+    @classmethod
+    def from_model(cls, model):
+        states = [estimator.tree_.__getstate__() for estimator in model.estimators_]
+
+        # Per node: depth below the root plus the expected depth of the
+        # training samples left in it, as IsolationForest sums per tree
+        leaf_values = [
+            estimator.tree_.compute_node_depths()
+            + average_path_length(estimator.tree_.n_node_samples)
+            - 1.0
+            for estimator in model.estimators_
+        ]
+
+        arrays = {
+            "nodes": np.concatenate([state["nodes"] for state in states]),
+            "values": np.concatenate([state["values"] for state in states]),
+            "leaf_values": np.concatenate(leaf_values),
+            "features": np.asarray(model.estimators_features_, dtype=np.intp),
+        }
+        info = {
+            "node_counts": [int(state["node_count"]) for state in states],
+            "max_depths": [int(state["max_depth"]) for state in states],
+            "n_features": int(model.n_features_in_),
+            "tree_features": len(model.estimators_features_[0]),
+            "denominator": float(len(states) * average_path_length([model.max_samples_])[0]),
+            "offset": float(model.offset_),
+            # Tree.__setstate__ is private: the arrays are only reused by
+            # the scikit-learn version that wrote them
+            "sklearn_version": sklearn.__version__,
+        }
+
+        return cls(arrays, info)
+
+    def save(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name in self.ARRAYS:
+            np.save(directory / f"{name}.npy", self.arrays[name])
+
+        (directory / FOREST_FILE).write_text(json.dumps(self.info, indent=2))
+
+    @classmethod
+    def load(cls, directory):
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in cls.ARRAYS}
+        info = json.loads((directory / FOREST_FILE).read_text())
+
+        if info.get("sklearn_version") != sklearn.__version__ or not _node_fields_match(arrays["nodes"].dtype):
+            raise RuntimeError(
+                f"{directory} was saved by scikit-learn {info.get('sklearn_version', 'unknown')}, "
+                f"not {sklearn.__version__}; rerun the pipeline to refit the model"
+            )
+
+        return cls(arrays, info)
+
+    def trees(self):
+        if self._trees is None:
+            ends = np.cumsum(self.info["node_counts"])
+            starts = ends - self.info["node_counts"]
+            n_classes = np.ones(1, dtype=np.intp)
+
+            self._trees = []
+            for start, end, max_depth in zip(starts, ends, self.info["max_depths"]):
+                tree = Tree(self.info["tree_features"], n_classes, 1)
+                tree.__setstate__({
+                    "max_depth": max_depth,
+                    "node_count": int(end - start),
+                    "nodes": np.ascontiguousarray(self.arrays["nodes"][start:end]),
+                    "values": np.ascontiguousarray(self.arrays["values"][start:end]),
+                })
+                self._trees.append((tree, start))
+
+        return self._trees
+
+    def decision_function(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        subsample = self.info["tree_features"] != self.info["n_features"]
+
+        depths = np.zeros(len(X))
+        for (tree, start), features in zip(self.trees(), self.arrays["features"]):
+            leaves = tree.apply(X[:, features] if subsample else X)
+            depths += self.arrays["leaf_values"][start + leaves]
+
+        return -(2 ** -(depths / self.info["denominator"])) - self.info["offset"]
+
+
+class ArrayScaler:
+    """StandardScaler.transform from its saved mean and scale."""
+
+    def __init__(self, mean, scale):
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_scaler(cls, scaler):
+        return cls(scaler.mean_, scaler.scale_)
+
+    def save(self, directory):
+        np.save(directory / "scaler_mean.npy", self.mean)
+        np.save(directory / "scaler_scale.npy", self.scale)
+
+    @classmethod
+    def load(cls, directory):
+        return cls(
+            np.load(directory / "scaler_mean.npy", mmap_mode="r"),
+            np.load(directory / "scaler_scale.npy", mmap_mode="r")
+        )
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+
+def save_artifacts(model, scaler, directory):
+    """Forest and scaler arrays; nothing is pickled."""
+    ForestArrays.from_model(model).save(directory)
+    ArrayScaler.from_scaler(scaler).save(directory)
+
+
+def load_artifacts(directory):
+    return ForestArrays.load(directory), ArrayScaler.load(directory)
+
+
+class ModelRegistry:
+    """
+    Versioned models of one kind (daily, monthly). A version id is the UTC
+    training time plus the start of the training-data hash; its manifest
+    records the feature list, data hash and training metadata.
+    """
+
+    def __init__(self, model_dir, name):
+        self.name = name
+        self.root = model_dir / REGISTRY_DIR / name
+
+    def current(self):
+        path = self.root / CURRENT_FILE
+        return path.read_text().strip() if path.exists() else None
+
+    def path(self, version=None):
+        version = version or self.current()
+        return self.root / version if version else None
+
+    def manifest(self, version=None):
+        path = self.path(version)
+
+        if path is None or not (path / MANIFEST_FILE).exists():
+            return None
+
+        return json.loads((path / MANIFEST_FILE).read_text())
+
+    def versions(self):
+        if not self.root.exists():
+            return []
+
+        return sorted(p.name for p in self.root.iterdir() if (p / MANIFEST_FILE).exists())
+
+    def new_version(self, data_hash):
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{data_hash[:8]}"
+
+        path = self.root / version
+        path.mkdir(parents=True)
+
+        return version, path
+
+    def publish(self, version, manifest):
+        """Writes the manifest and points CURRENT at the version."""
+        manifest = {"name": self.name, "version": version, "sklearn_version": sklearn.__version__, **manifest}
+        (self.root / version / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+        tmp_path = self.root / f"{CURRENT_FILE}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, self.root / CURRENT_FILE)
+
+        self._prune(version)
+
+    def _prune(self, current):
+        # Unpublished directories are left-overs of failed trainings
+        for path in self.root.iterdir():
+            if path.is_dir() and path.name != current and not (path / MANIFEST_FILE).exists():
+                shutil.rmtree(path)
+
+        older = [version for version in self.versions() if version != current]
+        for version in older[:max(len(older) - KEEP_VERSIONS, 0)]:
+            shutil.rmtree(self.root / version)
@@ -0,0 +1,362 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import sklearn
+
+from features.thresholds import QuantileSketch
+from modeling.anomaly import (
+    DAILY_MODEL,
+    FEATURE_COLS,
+    N_JOBS,
+    RESULTS_VERSION,
+    fit_predict,
+    fit_predict_chunked,
+    label_rows,
+    score_rows,
+)
+from modeling.explain import explain_anomalies, load_explainer, write_explanations
+from modeling.partitioned import (
+    PARTITION_DIR,
+    PartitionedModel,
+    fit_predict_partitioned,
+    fit_predict_partitioned_chunked,
+)
+from modeling.registry import ModelRegistry, load_artifacts, save_artifacts
+from processing.chunked import DEFAULT_MEMORY_BUDGET_MB, ChunkWriter, iter_chunks
+from processing.incremental import append_csv
+from utils.helpers import log
+
+KEY_COLUMNS = ["date", "state", "district"]
+
+# Retrain on a schedule, or earlier when new rows drift away from the
+# training distribution (population stability index over decile bins)
+RETRAIN_INTERVAL_DAYS = 30
+DRIFT_PSI_THRESHOLD = 0.2
+DRIFT_BINS = 10
+DRIFT_MIN_ROWS = 500
+PSI_EPSILON = 1e-4
+
+SCORE_BATCH_ROWS = 100_000
+
+
+def key_hashes(df):
+    return pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False).to_numpy()
+
+
+def row_hashes(df):
+    """
+    (key hash, content hash) per row; a changed row keeps its key hash.
+    Numbers are hashed as float64 so a chunk that reads a column as
+    integers hashes the same as one that reads floats.
+    """
+    numeric = df.select_dtypes("number").columns
+    content = df.astype(dict.fromkeys(numeric, np.float64))
+
+    return key_hashes(df), pd.util.hash_pandas_object(content, index=False).to_numpy()
+
+
+class ScoredRows:
+    """
+    Key and content hashes of every row in the results table, sorted by
+    key hash, so a scoring run can tell new and changed feature rows from
+    ones that are already scored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        if path.exists():
+            with np.load(path) as arrays:
+                self.keys = arrays["keys"]
+                self.rows = arrays["rows"]
+        else:
+            self.reset()
+
+    def reset(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.rows = np.empty(0, dtype=np.uint64)
+
+    def pending(self, keys, rows):
+        """Masks of rows never scored and rows scored with different content."""
+        if len(self.keys) == 0:
+            return np.ones(len(keys), dtype=bool), np.zeros(len(keys), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        known = self.keys[positions] == keys
+
+        return ~known, known & (self.rows[positions] != rows)
+
+    def record(self, keys, rows):
+        keys = np.concatenate([self.keys, keys])
+        rows = np.concatenate([self.rows, rows])
+
+        # Latest content wins for a key seen twice
+        order = np.argsort(keys, kind="stable")
+        keys, rows = keys[order], rows[order]
+        last = np.append(keys[1:] != keys[:-1], True)
+
+        self.keys, self.rows = keys[last], rows[last]
+
+    def forget(self, keys):
+        keep = ~np.isin(self.keys, keys)
+        self.keys, self.rows = self.keys[keep], self.rows[keep]
+
+    def save(self):
+        with open(self.path, "wb") as f:
+            np.savez(f, keys=self.keys, rows=self.rows)
+
+
+def population_stability(reference, df):
+    """PSI of every feature of `df` against the training decile bins."""
+    psi = {}
+
+    for col, ref in reference.items():
+        edges = np.asarray(ref["edges"])
+        expected = np.maximum(np.asarray(ref["proportions"]), PSI_EPSILON)
+
+        bins = np.searchsorted(edges, df[col].to_numpy(dtype=np.float64), side="right")
+        actual = np.bincount(bins, minlength=len(expected)) / len(df)
+        actual = np.maximum(actual, PSI_EPSILON)
+
+        psi[col] = float(np.sum((actual - expected) * np.log(actual / expected)))
+
+    return psi
+
+
+def load_model_meta(model_dir):
+    """Manifest of the current daily model, or None before the first training."""
+    return ModelRegistry(model_dir, DAILY_MODEL).manifest()
+
+
+def retrain_reason(meta, force=False, interval_days=RETRAIN_INTERVAL_DAYS, partition=None):
+    if force:
+        return "requested"
+
+    if meta is None:
+        return "no trained model"
+
+    if meta["feature_cols"] != FEATURE_COLS:
+        return "feature list changed"
+
+    if meta.get("results_version") != RESULTS_VERSION:
+        return "results format changed"
+
+    if meta.get("partition") != partition:
+        return "partitioning changed"
+
+    # The saved forest arrays only load in the scikit-learn version that wrote them
+    if meta.get("sklearn_version") != sklearn.__version__:
+        return f"scikit-learn changed from {meta.get('sklearn_version', 'an unknown version')} to {sklearn.__version__}"
+
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(meta["trained_at"])
+    if age >= timedelta(days=interval_days):
+        return f"model is {age.days} days old"
+
+    return None
+
+
+def load_scorer(model_dir, partition=None, n_jobs=N_JOBS):
+    """df -> float32 scores from the current daily model (or its partition router)."""
+    path = ModelRegistry(model_dir, DAILY_MODEL).path()
+
+    if partition is not None:
+        router = PartitionedModel.load(path / PARTITION_DIR)
+        return lambda df: router.score(df, n_jobs)
+
+    forest, scaler = load_artifacts(path)
+    return lambda df: score_rows(forest, scaler.transform(df[FEATURE_COLS]), n_jobs)
+
+
+def train_daily(feature_stem, results_path, model_dir, index, budget_mb=None, features=None,
+                n_jobs=N_JOBS, partition=None):
+    """
+    Full fit and rescore of every feature row, registered as a new current
+    "daily" model version. A streaming pass first records the index of
+    scored rows that later scoring runs start from, the drift reference
+    bins and the training-data hash.
+
+    With `partition` ("state" or "cluster") one model is fitted per
+    partition instead of a single global one (see modeling.partitioned).
+    """
+    registry = ModelRegistry(model_dir, DAILY_MODEL)
+
+    # Index, drift reference and training-data hash in one streaming pass
+    index.reset()
+    sketches = {col: QuantileSketch() for col in FEATURE_COLS}
+    data_hash = hashlib.blake2b(digest_size=16)
+    rows = 0
+
+    for chunk in iter_chunks(feature_stem, budget_mb or DEFAULT_MEMORY_BUDGET_MB):
+        keys, contents = row_hashes(chunk)
+        index.record(keys, contents)
+        data_hash.update(contents.tobytes())
+        rows += len(chunk)
+
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col])
+
+    reference = {}
+    for col, sketch in sketches.items():
+        edges = np.unique([sketch.quantile(q) for q in np.linspace(0, 1, DRIFT_BINS + 1)[1:-1]])
+        cumulative = [0.0, *(sketch.rank(edge) for edge in edges), 1.0]
+        reference[col] = {"edges": edges.tolist(), "proportions": np.diff(cumulative).tolist()}
+
+    version, path = registry.new_version(data_hash.hexdigest())
+
+    if budget_mb is None:
+        df = features if features is not None else pd.read_csv(feature_stem.with_suffix(".csv"))
+
+        if partition is None:
+            df, model, scaler = fit_predict(df, n_jobs)
+            save_artifacts(model, scaler, path)
+        else:
+            df, _ = fit_predict_partitioned(df, partition, path / PARTITION_DIR, n_jobs)
+
+        df.to_csv(results_path, index=False)
+        del df
+    elif partition is None:
+        model, scaler = fit_predict_chunked(feature_stem, results_path, budget_mb, n_jobs)
+        save_artifacts(model, scaler, path)
+    else:
+        fit_predict_partitioned_chunked(feature_stem, results_path, budget_mb, partition, path / PARTITION_DIR, n_jobs)
+
+    registry.publish(version, {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+        "feature_cols": FEATURE_COLS,
+        "training_data_hash": data_hash.hexdigest(),
+        "results_version": RESULTS_VERSION,
+        "partition": partition,
+        "drift_reference": reference,
+    })
+    index.save()
+
+
+def _pending_rows(feature_stem, index, budget_mb):
+    """New and changed feature rows, plus the keys of scored rows that are gone."""
+    frames, keys, contents, changed, seen = [], [], [], [], []
+
+    for chunk in iter_chunks(feature_stem, budget_mb):
+        chunk_keys, chunk_contents = row_hashes(chunk)
+        new, modified = index.pending(chunk_keys, chunk_contents)
+        take = new | modified
+        seen.append(chunk_keys)
+
+        if take.any():
+            frames.append(chunk[take])
+            keys.append(chunk_keys[take])
+            contents.append(chunk_contents[take])
+            changed.append(chunk_keys[modified])
+
+    removed = np.setdiff1d(index.keys, np.concatenate(seen)) if seen else index.keys
+
+    if not frames:
+        return None, None, None, np.empty(0, dtype=np.uint64), removed
+
+    return (
+        pd.concat(frames, ignore_index=True),
+        np.concatenate(keys),
+        np.concatenate(contents),
+        np.concatenate(changed),
+        removed,
+    )
+
+
+def _drop_results(results_path, keys, budget_mb):
+    """Rewrites the results (or explanations) without the given keys (rescored or removed rows)."""
+    tmp_path = results_path.with_name(results_path.stem + ".tmp.csv")
+
+    with ChunkWriter(tmp_path) as writer:
+        for chunk in iter_chunks(results_path.with_suffix(""), budget_mb):
+            keep = ~np.isin(key_hashes(chunk), keys)
+            writer.write(chunk[keep])
+
+    tmp_path.replace(results_path)
+
+
+def score_daily(feature_stem, results_path, model_dir, index_path, budget_mb=None, retrain=False,
+                drift_threshold=DRIFT_PSI_THRESHOLD, retrain_days=RETRAIN_INTERVAL_DAYS,
+                batch_rows=SCORE_BATCH_ROWS, load_features=None, n_jobs=N_JOBS, partition=None,
+                explanations_path=None):
+    """
+    Scores only the feature rows that are new or changed since the last
+    run with the persisted model and appends them to the results; results
+    of changed or removed rows are dropped first. With `explanations_path`
+    the anomalous rows' feature contributions (modeling.explain) are kept
+    in step with the results.
+
+    Retrains (train_daily) instead when asked, when the model is older than
+    `retrain_days`, when the feature list or `partition` changed, or when
+    the rows to score drift past `drift_threshold` PSI on any feature.
+    `load_features` may supply the feature frame for a retrain without
+    re-reading the file.
+    """
+    index = ScoredRows(index_path)
+    scan_budget = budget_mb or DEFAULT_MEMORY_BUDGET_MB
+
+    reason = retrain_reason(load_model_meta(model_dir), retrain, retrain_days, partition)
+    if reason is None and not results_path.exists():
+        reason = "no results yet"
+
+    pending = None
+    if reason is None:
+        pending, keys, contents, changed, removed = _pending_rows(feature_stem, index, scan_budget)
+
+        if pending is not None and len(pending) >= DRIFT_MIN_ROWS:
+            psi = population_stability(load_model_meta(model_dir)["drift_reference"], pending)
+            worst = max(psi, key=psi.get)
+
+            if psi[worst] > drift_threshold:
+                reason = f"drift in {worst} (PSI {psi[worst]:.2f})"
+
+    if reason is not None:
+        log(f"Retraining: {reason}")
+        features = load_features() if load_features is not None and budget_mb is None else None
+        train_daily(feature_stem, results_path, model_dir, index, budget_mb, features, n_jobs, partition)
+
+        if explanations_path is not None:
+            write_explanations(results_path, explanations_path, model_dir, scan_budget, partition)
+
+        return index.keys.size
+
+    # Missing explanations (results scored before they existed) are rebuilt
+    # from the results once those are up to date
+    rebuild = explanations_path is not None and not explanations_path.exists()
+
+    if len(changed) or len(removed):
+        dropped = np.concatenate([changed, removed])
+        _drop_results(results_path, dropped, scan_budget)
+        index.forget(removed)
+
+        if explanations_path is not None and not rebuild:
+            _drop_results(explanations_path, dropped, scan_budget)
+
+    if pending is None:
+        index.save()
+
+        if rebuild:
+            write_explanations(results_path, explanations_path, model_dir, scan_budget, partition)
+
+        log(f"No new or changed rows to score ({len(removed)} removed)")
+        return 0
+
+    score = load_scorer(model_dir, partition, n_jobs)
+    explain = load_explainer(model_dir, partition) if explanations_path is not None and not rebuild else None
+
+    for start in range(0, len(pending), batch_rows):
+        batch = pending.iloc[start:start + batch_rows]
+        batch = label_rows(batch, score(batch))
+        append_csv(batch, results_path)
+
+        if explain is not None:
+            append_csv(explain_anomalies(explain, batch), explanations_path)
+
+    index.record(keys, contents)
+    index.save()
+
+    if rebuild:
+        write_explanations(results_path, explanations_path, model_dir, scan_budget, partition)
+
+    log(f"Scored {len(pending)} rows ({len(changed)} changed, {len(removed)} removed) with the saved model")
+    return len(pending)
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from processing.table_io import read_table, table_path
+from utils.helpers import log
+
+HASH_BLOCK_SIZE = 1 << 20
+MAX_JOBS = 4
+
+
+class Step:
+    """
+    One pipeline step.
+
+    `inputs` and `outputs` are artifact paths: a file, a directory (every
+    file below it) or a processed-table stem (its .parquet, else its .csv).
+    A step that reads an artifact another step writes depends on it.
+
+    `run(ctx)` may return {output: DataFrame}. Later steps in the same run
+    get that frame from ctx.load instead of re-reading the file, so steps
+    must not modify frames they load.
+
+    A step is skipped when the content hash of its inputs and parameters
+    matches the last successful run and its outputs are unchanged since.
+    `always` steps (API ingestion) have no local inputs and always run.
+    `deps` names steps that must finish first although no artifact links
+    them (ingestions that share one API rate limit).
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, always=False, deps=()):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.always = always
+        self.deps = list(deps)
+
+
+def artifact_files(artifact):
+    if artifact.is_dir():
+        return sorted(p for p in artifact.rglob("*") if p.is_file())
+
+    if artifact.suffix:
+        return [artifact] if artifact.exists() else []
+
+    for path in (table_path(artifact), artifact.with_suffix(".csv")):
+        if path.exists():
+            return [path]
+
+    return []
+
+
+def load_artifact(artifact):
+    if artifact.suffix == ".csv":
+        return pd.read_csv(artifact)
+
+    return read_table(artifact)
+
+
+class FileHasher:
+    """
+    Content hashes of files, cached by (size, mtime) so an unchanged file
+    is only read once across runs.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def file_digest(self, path):
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached is not None and cached[:2] == signature:
+            return cached[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        with self.lock:
+            self.cache[key] = [*signature, digest.hexdigest()]
+
+        return digest.hexdigest()
+
+    def digest(self, artifacts, params=None):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+
+        for artifact in artifacts:
+            digest.update(f"\0{artifact}".encode())
+
+            for path in artifact_files(artifact):
+                digest.update(f"\0{path.relative_to(artifact.parent)}:{self.file_digest(path)}".encode())
+
+        return digest.hexdigest()
+
+
+class RunContext:
+    """What a running step sees: frames produced earlier in this run, else the files."""
+
+    def __init__(self):
+        self.frames = {}
+        self.lock = threading.Lock()
+
+    def load(self, artifact):
+        with self.lock:
+            frame = self.frames.get(artifact)
+
+        if frame is not None:
+            return frame
+
+        return load_artifact(artifact)
+
+
+class Pipeline:
+    """
+    Runs steps in dependency order on a thread pool; independent steps
+    (the three cleanings) run concurrently.
+    """
+
+    def __init__(self, steps, state_path, jobs=MAX_JOBS, force=False):
+        self.steps = {step.name: step for step in steps}
+        self.state_path = state_path
+        self.jobs = jobs
+        self.force = force
+
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        self.records = state.get("steps", {})
+        self.hasher = FileHasher(state.get("files", {}))
+        self.state_lock = threading.Lock()
+
+        producers = {}
+        for step in steps:
+            for artifact in step.outputs:
+                if artifact in producers:
+                    raise RuntimeError(
+                        f"{artifact} is written by both {producers[artifact]} and {step.name}"
+                    )
+                producers[artifact] = step.name
+
+        for step in steps:
+            unknown = set(step.deps) - set(self.steps)
+            if unknown:
+                raise RuntimeError(f"{step.name} depends on unknown steps: {sorted(unknown)}")
+
+        self.dependencies = {
+            step.name: {producers[a] for a in step.inputs if a in producers} | set(step.deps)
+            for step in steps
+        }
+
+        # Frames are dropped once every step reading them has finished
+        self.readers = {}
+        for step in steps:
+            for artifact in step.inputs:
+                self.readers[artifact] = self.readers.get(artifact, 0) + 1
+
+    def _save_state(self):
+        with self.hasher.lock:
+            files = dict(self.hasher.cache)
+
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(
+            {"steps": self.records, "files": files},
+            indent=2,
+            sort_keys=True
+        ))
+        tmp_path.replace(self.state_path)
+
+    def _execute(self, step, ctx):
+        input_digest = self.hasher.digest(step.inputs, step.params)
+        record = self.records.get(step.name)
+
+        if (
+            not self.force
+            and not step.always
+            and record is not None
+            and record["inputs"] == input_digest
+            and record["outputs"] == self.hasher.digest(step.outputs)
+        ):
+            log(f" SKIPPED: {step.name} (inputs unchanged)")
+            return
+
+        log(f"\n STARTING: {step.name}")
+        start = time.perf_counter()
+
+        frames = step.run(ctx) or {}
+
+        unknown = set(frames) - set(step.outputs)
+        if unknown:
+            raise RuntimeError(f"{step.name} returned undeclared outputs: {sorted(map(str, unknown))}")
+
+        with ctx.lock:
+            for artifact, frame in frames.items():
+                if self.readers.get(artifact):
+                    ctx.frames[artifact] = frame
+
+        output_digest = self.hasher.digest(step.outputs)
+
+        with self.state_lock:
+            self.records[step.name] = {"inputs": input_digest, "outputs": output_digest}
+            self._save_state()
+
+        log(f" COMPLETED: {step.name} ({time.perf_counter() - start:.1f}s)")
+
+    def _release_inputs(self, step, ctx):
+        with ctx.lock:
+            for artifact in step.inputs:
+                self.readers[artifact] -= 1
+                if self.readers[artifact] == 0:
+                    ctx.frames.pop(artifact, None)
+
+    def run(self):
+        """Returns True when every step ran or was skipped."""
+        ctx = RunContext()
+        pending = dict(self.steps)
+        done = set()
+        running = {}
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                if not failed:
+                    for name, step in list(pending.items()):
+                        if self.dependencies[name] <= done:
+                            running[pool.submit(self._execute, step, ctx)] = step
+                            del pending[name]
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    step = running.pop(future)
+                    self._release_inputs(step, ctx)
+
+                    try:
+                        future.result()
+                    except Exception:
+                        traceback.print_exc()
+                        log(f"\n FAILED: {step.name}")
+                        failed.append(step.name)
+                    else:
+                        done.add(step.name)
+
+        # Forget hashes of files that no longer exist
+        with self.hasher.lock:
+            self.hasher.cache = {
+                key: value for key, value in self.hasher.cache.items()
+                if Path(key).exists()
+            }
+
+        with self.state_lock:
+            self._save_state()
+
+        if pending and not failed:
+            raise RuntimeError(f"Dependency cycle between steps: {sorted(pending)}")
+
+        return not failed
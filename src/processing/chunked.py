@@ -0,0 +1,119 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from processing.table_io import DATE_COLUMNS, PARQUET_COMPRESSION, table_path, to_arrow
+
+# Chunked execution: every stage streams its input in pieces sized so the
+# piece plus the transform's working copies stay inside the budget.
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# In-memory size of a chunk's working set relative to the chunk itself
+# (intermediate columns, masks and the output frame)
+WORKING_SET_FACTOR = 4
+
+# On-disk raw bytes to in-memory bytes once typed; CSV shrinks slightly,
+# zstd Parquet pages expand
+RAW_EXPANSION = {".csv": 1.0, ".parquet": 5.0}
+
+MIN_CHUNK_ROWS = 1_000
+
+
+def budget_bytes(budget_mb):
+    return int(budget_mb * 2 ** 20)
+
+
+def rows_per_chunk(bytes_per_row, budget_mb, factor=WORKING_SET_FACTOR):
+    return max(MIN_CHUNK_ROWS, int(budget_bytes(budget_mb) / (bytes_per_row * factor)))
+
+
+def group_files(files, budget_mb=None):
+    """
+    Splits raw batch files into consecutive groups whose estimated
+    in-memory size fits the budget. Without a budget everything is one group.
+    """
+    if budget_mb is None:
+        return [files] if files else []
+
+    limit = budget_bytes(budget_mb) / WORKING_SET_FACTOR
+    groups, current, current_bytes = [], [], 0
+
+    for f in files:
+        size = f.stat().st_size * RAW_EXPANSION.get(f.suffix, 1.0)
+
+        if current and current_bytes + size > limit:
+            groups.append(current)
+            current, current_bytes = [], 0
+
+        current.append(f)
+        current_bytes += size
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+
+def iter_chunks(stem, budget_mb, columns=None):
+    """Streams a processed table (Parquet, or the CSV fallback) in budget-sized frames."""
+    path = table_path(stem)
+
+    if path.exists():
+        parquet = pq.ParquetFile(path)
+        metadata = parquet.metadata
+
+        total_bytes = sum(metadata.row_group(i).total_byte_size for i in range(metadata.num_row_groups))
+        bytes_per_row = max(total_bytes / max(metadata.num_rows, 1), 1)
+
+        for batch in parquet.iter_batches(batch_size=rows_per_chunk(bytes_per_row, budget_mb), columns=columns):
+            yield batch.to_pandas()
+        return
+
+    csv_path = stem.with_suffix(".csv")
+    sample = pd.read_csv(csv_path, usecols=columns, nrows=MIN_CHUNK_ROWS)
+    bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=rows_per_chunk(bytes_per_row, budget_mb)):
+        for col in DATE_COLUMNS:
+            if col in chunk:
+                chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+        yield chunk
+
+
+def count_rows(stem):
+    path = table_path(stem)
+
+    if path.exists():
+        return pq.ParquetFile(path).metadata.num_rows
+
+    with open(stem.with_suffix(".csv"), "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+class ChunkWriter:
+    """Appends chunk outputs to one CSV or Parquet file, in arrival order."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+        if path.exists():
+            path.unlink()
+
+    def write(self, df):
+        if self.path.suffix == ".parquet":
+            table = to_arrow(df)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema, compression=PARQUET_COMPRESSION)
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            df.to_csv(self.path, mode="a", index=False, header=not self.path.exists())
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,288 @@
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from processing.raw_batches import list_raw_files, load_raw_batches, parse_dates
+from processing.incremental import RawManifest, RowHashSet, append_csv, merge_partial_aggregate
+from processing.table_io import write_table
+from processing.chunked import group_files
+from utils.helpers import log
+
+GEO_COLUMNS = ["state", "district"]
+AGG_KEYS = ["date", "state", "district"]
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# tracemalloc is one process-wide trace and slows cleaning several times
+# over, so it is opt-in (trace_memory) and traced runs never overlap
+_tracing_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    name: str
+    count_columns: tuple
+    total_column: str
+
+    @property
+    def raw_columns(self):
+        # pincode is only read so deduplication sees the full raw row
+        return ["date", *GEO_COLUMNS, "pincode", *self.count_columns]
+
+    @property
+    def agg_columns(self):
+        return [*self.count_columns, self.total_column]
+
+
+SCHEMAS = {
+    "enrolment": DatasetSchema(
+        name="enrolment",
+        count_columns=("age_0_5", "age_5_17", "age_18_greater"),
+        total_column="enrolment_count",
+    ),
+    "biometric": DatasetSchema(
+        name="biometric",
+        count_columns=("bio_age_5_17", "bio_age_17_"),
+        total_column="biometric_count",
+    ),
+    "demographic": DatasetSchema(
+        name="demographic",
+        count_columns=("demo_age_5_17", "demo_age_17_"),
+        total_column="demographic_count",
+    ),
+}
+
+
+def _to_categorical(codes, labels):
+    remap, categories = pd.factorize(labels)
+
+    return pd.Categorical.from_codes(
+        np.where(codes >= 0, remap[codes], -1),
+        categories=categories
+    )
+
+
+def normalize_geography(states, districts, resolver=None):
+    """
+    Normalizes each distinct (state, district) spelling once, then
+    broadcasts the result back through the factorized codes.
+
+    Pairs the resolver maps to a reference district take its canonical
+    names; everything else is stripped and title-cased. Missing names stay
+    missing.
+    """
+    state_codes, state_uniques = pd.factorize(states)
+    district_codes, district_uniques = pd.factorize(districts)
+
+    if len(state_uniques) == 0 or len(district_uniques) == 0:
+        missing = pd.Categorical.from_codes(np.full(len(state_codes), -1), categories=[])
+        return missing, missing.copy()
+
+    n_districts = max(len(district_uniques), 1)
+    pairs = np.where(
+        (state_codes >= 0) & (district_codes >= 0),
+        state_codes.astype(np.int64) * n_districts + district_codes,
+        -1
+    )
+    pair_codes, pair_uniques = pd.factorize(pairs, use_na_sentinel=False)
+    valid = pair_uniques >= 0
+
+    raw_states = pd.Index(state_uniques).take(np.where(valid, pair_uniques // n_districts, -1), allow_fill=True)
+    raw_districts = pd.Index(district_uniques).take(np.where(valid, pair_uniques % n_districts, -1), allow_fill=True)
+
+    state_labels = raw_states.astype(str).str.strip().str.title().to_numpy(dtype=object)
+    district_labels = raw_districts.astype(str).str.strip().str.title().to_numpy(dtype=object)
+    state_labels[~valid] = None
+    district_labels[~valid] = None
+
+    if resolver is not None and not resolver.empty:
+        for i in np.flatnonzero(valid):
+            code = resolver.resolve(raw_states[i], raw_districts[i])
+            if code is not None:
+                state_labels[i], district_labels[i] = resolver.canonical_names(code)
+
+    pair_codes = np.where(valid[pair_codes], pair_codes, -1)
+
+    return (
+        _to_categorical(pair_codes, state_labels),
+        _to_categorical(pair_codes, district_labels),
+    )
+
+
+def clean_frame(raw, schema, resolver=None):
+    count_cols = list(schema.count_columns)
+
+    states, districts = normalize_geography(raw["state"], raw["district"], resolver)
+    counts = raw[count_cols].fillna(0).to_numpy(dtype=np.int64)
+
+    # One combined mask: known geography and no negative counts
+    valid = (
+        (states.codes >= 0)
+        & (districts.codes >= 0)
+        & (counts >= 0).all(axis=1)
+    )
+
+    clean = pd.DataFrame({
+        "date": parse_dates(raw["date"])[valid],
+        "state": states[valid],
+        "district": districts[valid],
+        "pincode": raw["pincode"].to_numpy()[valid],
+    })
+
+    for i, col in enumerate(count_cols):
+        clean[col] = counts[valid, i]
+
+    clean[schema.total_column] = counts[valid].sum(axis=1)
+
+    return clean
+
+
+def aggregate_daily(clean, schema):
+    return (
+        clean
+        .groupby(AGG_KEYS, as_index=False, observed=True)
+        [schema.agg_columns]
+        .sum()
+    )
+
+
+def sort_by_keys(agg):
+    """
+    Orders an aggregate by (date, state, district) with lexically sorted
+    categories, the layout the daily merge expects from its inputs.
+    """
+    for col in GEO_COLUMNS:
+        agg[col] = agg[col].astype("category")
+        agg[col] = agg[col].cat.reorder_categories(sorted(agg[col].cat.categories))
+
+    return agg.sort_values(AGG_KEYS, ignore_index=True)
+
+
+@contextmanager
+def _traced_memory():
+    """Yields a dict that holds the traced peak in bytes ("peak") on exit."""
+    with _tracing_lock:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        traced = {}
+
+        try:
+            yield traced
+        finally:
+            _, traced["peak"] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+
+def _peak_rss_mib():
+    # Process-wide high-water mark: KiB on Linux, bytes on macOS
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_cleaning(schema, raw_dir, processed_dir, incremental=False, workers=None, resolver=None,
+                 budget_mb=None, trace_memory=False):
+    clean_path = processed_dir / f"{schema.name}_clean.csv"
+    agg_stem = processed_dir / f"{schema.name}_agg"
+
+    # Incremental state: raw files already cleaned and hashes of kept rows
+    manifest = RawManifest(processed_dir / f"{schema.name}_manifest.json")
+    row_hashes = RowHashSet(processed_dir / f"{schema.name}_row_hashes.npy")
+
+    if not incremental:
+        manifest.reset()
+        row_hashes.reset()
+
+    all_files = list_raw_files(raw_dir)
+
+    if not all_files:
+        raise RuntimeError(f"No {schema.name} raw files found in {raw_dir}")
+
+    files = manifest.new_files(all_files)
+
+    if not files:
+        log(f"No new {schema.name} raw files since last run")
+        return None
+
+    log(f"{schema.name}: raw files to process: {len(files)} of {len(all_files)}")
+
+    if not incremental and clean_path.exists():
+        clean_path.unlink()
+
+    with _traced_memory() if trace_memory else nullcontext({}) as traced:
+        start = time.perf_counter()
+
+        # With a memory budget the files are cleaned a group at a time; the row
+        # hash set deduplicates across groups and the per-group partial sums
+        # are combined at the end, so the outputs match a single pass
+        raw_rows = 0
+        removed = 0
+        partials = []
+
+        for group in group_files(files, budget_mb):
+            raw = load_raw_batches(group, schema.raw_columns, workers=workers)
+            raw_rows += len(raw)
+            clean = clean_frame(raw, schema, resolver)
+            del raw
+
+            before = len(clean)
+            clean = row_hashes.filter_new(clean)
+            removed += before - len(clean)
+
+            append_csv(clean, clean_path)
+            partials.append(aggregate_daily(clean, schema))
+            del clean
+
+        log(f"{schema.name}: duplicates removed: {removed}")
+
+        agg = partials[0]
+        if len(partials) > 1:
+            agg = (
+                pd.concat(partials, ignore_index=True)
+                .groupby(AGG_KEYS, as_index=False, observed=True)
+                .sum()
+            )
+
+        elapsed = time.perf_counter() - start
+
+    if incremental:
+        agg = merge_partial_aggregate(agg_stem, agg, AGG_KEYS)
+
+    agg = sort_by_keys(agg)
+    write_table(agg, agg_stem)
+
+    # Persist incremental state only once both outputs are written
+    manifest.record(files)
+    manifest.save()
+    row_hashes.save()
+
+    if resolver is not None:
+        resolver.save()
+
+    dup_count = agg.duplicated(AGG_KEYS).sum()
+    log(f"{schema.name}: duplicate rows after aggregation: {dup_count}")
+
+    if trace_memory:
+        memory = f"traced peak {traced['peak'] / 2 ** 20:,.1f} MiB"
+    else:
+        rss = _peak_rss_mib()
+        memory = "process peak RSS n/a" if rss is None else f"process peak RSS {rss:,.1f} MiB"
+
+    log(
+        f"{schema.name}: {raw_rows:,} rows in {elapsed:.2f}s "
+        f"({raw_rows / max(elapsed, 1e-9):,.0f} rows/s), {memory} "
+        f"(+ {pa.default_memory_pool().max_memory() / 2 ** 20:,.1f} MiB Arrow)"
+    )
+
+    return agg
@@ -0,0 +1,167 @@
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+import pandas as pd
+
+# Reference dictionary: one row per known spelling, columns
+# state, district, district_code. The first row for a code is its
+# canonical spelling; further rows are aliases.
+NGRAM = 3
+CANDIDATES = 5
+FUZZY_THRESHOLD = 0.8
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name):
+    """Lookup key: case, punctuation and spacing differences removed."""
+    name = str(name).lower().replace("&", " and ")
+    return _NON_ALNUM.sub(" ", name).strip()
+
+
+def _ngrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+class NgramIndex:
+    """
+    Inverted character n-gram index. Shared n-grams shortlist candidates;
+    the shortlist is then scored by edit similarity, which is far less
+    harsh than n-gram overlap on short names (Purnea / Purnia).
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+        self.values = {}
+
+    def add(self, key, value):
+        self.values[key] = value
+
+        for gram in _ngrams(key):
+            self.postings[gram].add(key)
+
+    def best_match(self, key, threshold=FUZZY_THRESHOLD):
+        shared = Counter()
+
+        for gram in _ngrams(key):
+            shared.update(self.postings.get(gram, ()))
+
+        best, best_score = None, threshold
+        for candidate, _ in shared.most_common(CANDIDATES):
+            score = SequenceMatcher(None, key, candidate).ratio()
+
+            if score >= best_score:
+                best, best_score = self.values[candidate], score
+
+        return best
+
+
+class GeoResolver:
+    """
+    Maps raw (state, district) spellings to canonical district codes.
+
+    Exact matches on the normalized key are a dict lookup. Anything else is
+    matched once against an n-gram index of the reference names within the
+    resolved state, and the outcome (including "no match") is cached on disk
+    so later runs only pay for spellings they have never seen.
+    """
+
+    def __init__(self, reference_path, cache_path):
+        self.cache_path = cache_path
+        self.canonical = {}
+        self.exact = {}
+        self.states = {}
+        self.state_index = NgramIndex()
+        self.district_index = defaultdict(NgramIndex)
+
+        self.fingerprint = None
+        if reference_path.exists():
+            stat = reference_path.stat()
+            self.fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+            self._load_reference(pd.read_csv(reference_path, dtype=str))
+
+        # Cached fuzzy outcomes are only valid for the reference they were
+        # computed against
+        cached = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+        if cached.get("reference") == self.fingerprint:
+            self.cache = cached.get("matches", {})
+        else:
+            self.cache = {}
+
+        self.dirty = False
+
+        # Cleaning steps may share one resolver across threads
+        self.lock = threading.Lock()
+
+    def _load_reference(self, reference):
+        for row in reference.itertuples(index=False):
+            state_key = normalize_name(row.state)
+            district_key = normalize_name(row.district)
+            code = row.district_code
+
+            self.canonical.setdefault(code, (row.state.strip(), row.district.strip()))
+            self.exact[(state_key, district_key)] = code
+
+            # Aliases may spell the state differently; every spelling routes
+            # to the canonical state's key so fuzzy lookups find its districts
+            canonical_state = normalize_name(self.canonical[code][0])
+
+            if state_key not in self.states:
+                self.states[state_key] = canonical_state
+                self.state_index.add(state_key, canonical_state)
+
+            self.district_index[canonical_state].add(district_key, code)
+
+    @property
+    def empty(self):
+        return not self.canonical
+
+    def resolve(self, state, district):
+        state_key = normalize_name(state)
+        district_key = normalize_name(district)
+
+        code = self.exact.get((state_key, district_key))
+        if code is not None:
+            return code
+
+        cache_key = f"{state_key}|{district_key}"
+        if cache_key in self.cache:
+            return self.cache[cache_key]
+
+        code = self._fuzzy(state_key, district_key)
+
+        with self.lock:
+            self.cache[cache_key] = code
+            self.dirty = True
+
+        return code
+
+    def _fuzzy(self, state_key, district_key):
+        resolved_state = self.states.get(state_key) or self.state_index.best_match(state_key)
+        if resolved_state is None:
+            return None
+
+        index = self.district_index.get(resolved_state)
+        if index is None:
+            return None
+
+        return index.best_match(district_key)
+
+    def canonical_names(self, code):
+        return self.canonical[code]
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps(
+                {"reference": self.fingerprint, "matches": self.cache},
+                indent=2,
+                sort_keys=True
+            ))
+            self.dirty = False
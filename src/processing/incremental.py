@@ -0,0 +1,85 @@
+import json
+import numpy as np
+import pandas as pd
+
+from processing.table_io import read_table, table_exists
+
+
+class RawManifest:
+    """
+    Records which raw batch files have already been cleaned, keyed by file
+    name with the size and mtime seen at the time. A file that has grown
+    since (an interrupted batch that was appended to) is treated as new;
+    the row-hash set keeps its already-seen rows from being counted twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+
+    @staticmethod
+    def _signature(path):
+        stat = path.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def new_files(self, files):
+        return [
+            f for f in files
+            if self.entries.get(f.name) != self._signature(f)
+        ]
+
+    def record(self, files):
+        for f in files:
+            self.entries[f.name] = self._signature(f)
+
+    def reset(self):
+        self.entries = {}
+
+    def save(self):
+        self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+
+
+class RowHashSet:
+    """
+    Persisted 64-bit hashes of every cleaned row kept so far, so
+    deduplication keeps working across incremental runs.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = np.load(path) if path.exists() else np.empty(0, dtype=np.uint64)
+
+    def filter_new(self, df):
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= ~np.isin(hashes, self.hashes, assume_unique=False)
+
+        self.hashes = np.union1d(self.hashes, hashes[keep])
+        return df[keep]
+
+    def reset(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def save(self):
+        with open(self.path, "wb") as f:
+            np.save(f, self.hashes)
+
+
+def append_csv(df, path):
+    write_header = not path.exists() or path.stat().st_size == 0
+    df.to_csv(path, mode="a", index=False, header=write_header)
+
+
+def merge_partial_aggregate(stem, partial, keys):
+    """Adds a new batch's (date, state, district) partial sums to an existing aggregate."""
+    if not table_exists(stem):
+        return partial
+
+    existing = read_table(stem)
+
+    return (
+        pd.concat([existing, partial], ignore_index=True)
+        .groupby(keys, as_index=False, observed=True)
+        .sum()
+    )
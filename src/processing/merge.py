@@ -0,0 +1,226 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from processing.chunked import iter_chunks
+from processing.table_io import PARQUET_COMPRESSION, read_table, table_path, to_arrow, write_table
+
+KEYS = ["date", "state", "district"]
+GEO_COLUMNS = ["state", "district"]
+
+# Date partition merged at a time under a memory budget: a month of
+# district-days is small next to any sensible budget
+BUDGET_PARTITION_FREQ = "M"
+
+# Every merge also saves one digest per date of the merged rows, so readers
+# extending their state to later days can tell whether earlier days changed
+DIGESTS_SUFFIX = "_date_digests.npz"
+
+
+def _unified_categories(frames, col):
+    categories = set()
+    for df in frames:
+        categories.update(df[col].astype("category").cat.categories)
+
+    return pd.Index(sorted(categories))
+
+
+def _composite_keys(df, states, districts):
+    """
+    Packs (date, state, district) into one int64 whose order matches the
+    tuple order, given lexically sorted categories.
+    """
+    days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    state_codes = pd.Categorical(df["state"], categories=states).codes.astype(np.int64)
+    district_codes = pd.Categorical(df["district"], categories=districts).codes.astype(np.int64)
+
+    return (days * len(states) + state_codes) * len(districts) + district_codes
+
+
+def merge_daily(frames):
+    """
+    Outer-joins the per-dataset daily aggregates on (date, state, district).
+
+    Inputs written by the cleaning stage are already sorted with sorted
+    categories, so their composite keys are sorted runs: the stable sort
+    below is a run merge (linear) and each value column is scattered once
+    into a preallocated output. Days a dataset has no row for count as 0.
+    """
+    frames = [df.dropna(subset=KEYS) for df in frames]
+
+    states = _unified_categories(frames, "state")
+    districts = _unified_categories(frames, "district")
+
+    keys = [_composite_keys(df, states, districts) for df in frames]
+    all_keys = np.concatenate(keys)
+
+    order = np.argsort(all_keys, kind="stable")
+    sorted_keys = all_keys[order]
+
+    is_new = np.empty(len(sorted_keys), dtype=bool)
+    is_new[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=is_new[1:])
+
+    slots = np.empty(len(all_keys), dtype=np.int64)
+    slots[order] = np.cumsum(is_new) - 1
+
+    merged_keys = sorted_keys[is_new]
+    district_codes = merged_keys % len(districts)
+    rest = merged_keys // len(districts)
+    state_codes = rest % len(states)
+    days = rest // len(states)
+
+    merged = pd.DataFrame({
+        "date": pd.to_datetime(days.astype("datetime64[D]")),
+        "state": pd.Categorical.from_codes(state_codes, categories=states),
+        "district": pd.Categorical.from_codes(district_codes, categories=districts),
+    })
+
+    start = 0
+    for df, frame_keys in zip(frames, keys):
+        frame_slots = slots[start:start + len(frame_keys)]
+        start += len(frame_keys)
+
+        for col in df.columns.difference(KEYS, sort=False):
+            values = df[col].to_numpy()
+            out = np.zeros(len(merged_keys), dtype=values.dtype)
+            out[frame_slots] = values
+            merged[col] = out
+
+    return merged
+
+
+def _partition_bounds(stems, freq):
+    periods = set()
+    for stem in stems:
+        dates = read_table(stem, columns=["date"])["date"].dropna()
+        periods.update(dates.dt.to_period(freq).unique())
+
+    return [
+        (period.start_time, (period + 1).start_time)
+        for period in sorted(periods)
+    ]
+
+
+def digests_path(stem):
+    return stem.with_name(stem.name + DIGESTS_SUFFIX)
+
+
+def date_digests(df):
+    """
+    One uint64 per date: the wrapping sum of the row hashes of that date's
+    rows, so it does not depend on row order or on how the table was split.
+    Counts are hashed as float64 and geography by value.
+    """
+    values = df.drop(columns="date")
+    values = values.astype({
+        col: np.float64 for col in values.columns if pd.api.types.is_numeric_dtype(values[col])
+    })
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+    return _sum_by_date(df["date"].to_numpy(dtype="datetime64[D]"), hashes)
+
+
+def _sum_by_date(days, hashes):
+    dates, inverse = np.unique(days, return_inverse=True)
+    sums = np.zeros(len(dates), dtype=np.uint64)
+    np.add.at(sums, inverse, hashes)
+
+    return pd.Series(sums, index=pd.DatetimeIndex(dates))
+
+
+def write_date_digests(digests, stem):
+    with open(digests_path(stem), "wb") as f:
+        np.savez(f, dates=digests.index.to_numpy(dtype="datetime64[D]"), digests=digests.to_numpy())
+
+
+def read_date_digests(stem, budget_mb=None):
+    """
+    The per-date digests saved with the merged table at `stem`. When they
+    are missing or older than the table (written by something else), they
+    are recomputed from the table, chunk by chunk under a budget.
+    """
+    path = digests_path(stem)
+    table = table_path(stem) if table_path(stem).exists() else stem.with_suffix(".csv")
+
+    if path.exists() and path.stat().st_mtime_ns >= table.stat().st_mtime_ns:
+        with np.load(path) as arrays:
+            return pd.Series(arrays["digests"], index=pd.DatetimeIndex(arrays["dates"]))
+
+    chunks = [read_table(stem)] if budget_mb is None else iter_chunks(stem, budget_mb)
+    parts = [date_digests(chunk) for chunk in chunks]
+
+    if not parts:
+        return pd.Series(np.zeros(0, dtype=np.uint64), index=pd.DatetimeIndex([]))
+
+    return _sum_by_date(
+        np.concatenate([part.index.to_numpy(dtype="datetime64[D]") for part in parts]),
+        np.concatenate([part.to_numpy() for part in parts])
+    )
+
+
+def digest_through(digests, last_date):
+    """One digest of every date up to and including `last_date`."""
+    kept = digests[digests.index <= pd.Timestamp(last_date)]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(kept.index.to_numpy(dtype="datetime64[D]").tobytes())
+    digest.update(kept.to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+
+def first_changed_date(old, new):
+    """Earliest date whose rows differ between two sets of digests, or None."""
+    common = old.index.intersection(new.index)
+    changed = old.index.symmetric_difference(new.index).union(
+        common[old[common].to_numpy() != new[common].to_numpy()]
+    )
+
+    return changed.min() if len(changed) else None
+
+
+def write_merged(merged, out_stem):
+    write_table(merged, out_stem)
+    write_date_digests(date_digests(merged), out_stem)
+
+
+def merge_daily_tables(stems, out_stem, freq=None):
+    """
+    Merges the aggregates stored at `stems` into `out_stem`, with its
+    per-date digests.
+
+    With a partition frequency (e.g. "M") only one date partition of every
+    input is in memory at a time and each becomes a Parquet row group.
+    """
+    if freq is None:
+        merged = merge_daily([read_table(stem) for stem in stems])
+        write_merged(merged, out_stem)
+        return len(merged)
+
+    writer = None
+    rows = 0
+    digests = []
+
+    try:
+        for lo, hi in _partition_bounds(stems, freq):
+            filters = [("date", ">=", lo), ("date", "<", hi)]
+            merged = merge_daily([read_table(stem, filters=filters) for stem in stems])
+
+            table = to_arrow(merged)
+            if writer is None:
+                writer = pq.ParquetWriter(table_path(out_stem), table.schema, compression=PARQUET_COMPRESSION)
+
+            writer.write_table(table)
+            rows += len(merged)
+            digests.append(date_digests(merged))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    # Partitions are disjoint date ranges, so their digests just concatenate
+    if digests:
+        write_date_digests(pd.concat(digests), out_stem)
+
+    return rows
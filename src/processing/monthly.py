@@ -0,0 +1,60 @@
+import pandas as pd
+
+from processing.chunked import iter_chunks
+
+MONTHLY_KEYS = ["year_month", "state", "district"]
+
+MONTHLY_SUMS = {
+    "demographic_count": "sum",
+    "enrolment_count": "sum",
+    "biometric_count": "sum",
+    "demo_age_5_17": "sum",
+    "demo_age_17_": "sum"
+}
+
+
+def _monthly_sums(daily_df):
+    monthly = daily_df[["state", "district", *MONTHLY_SUMS]].copy()
+
+    # Ensure date is datetime
+    monthly["year_month"] = pd.to_datetime(
+        daily_df["date"],
+        errors="coerce"
+    ).dt.to_period("M")
+
+    return (
+        monthly
+        .groupby(MONTHLY_KEYS, as_index=False, observed=True)
+        .agg(MONTHLY_SUMS)
+    )
+
+
+def _to_month_start(monthly_agg):
+    # Convert Period to timestamp (month start)
+    monthly_agg["year_month"] = monthly_agg["year_month"].dt.to_timestamp()
+    return monthly_agg
+
+
+def aggregate_monthly(daily_df):
+    """(year_month, state, district) sums of master_district_daily; `daily_df` is not modified."""
+    return _to_month_start(_monthly_sums(daily_df))
+
+
+def aggregate_monthly_chunked(daily_stem, budget_mb):
+    # Per-chunk partial sums, combined once at the end
+    partials = [
+        _monthly_sums(chunk)
+        for chunk in iter_chunks(
+            daily_stem,
+            budget_mb,
+            columns=["date", "state", "district", *MONTHLY_SUMS]
+        )
+    ]
+
+    monthly_agg = (
+        pd.concat(partials, ignore_index=True)
+        .groupby(MONTHLY_KEYS, as_index=False, observed=True)
+        .agg(MONTHLY_SUMS)
+    )
+
+    return _to_month_start(monthly_agg)
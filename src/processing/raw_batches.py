@@ -0,0 +1,108 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+RAW_FILE_PATTERN = re.compile(r"raw_api_offset_(\d+)\.(csv|parquet)$")
+
+# data.gov.in publishes dates as dd-mm-yyyy; inferring the format per file
+# silently reads the first ambiguous value month-first and drops the rest
+DATE_FORMAT = "%d-%m-%Y"
+
+# Declared raw schema. Counts and pincodes fit comfortably in int32, and
+# dates and geography repeat heavily so they are dictionary-encoded and
+# arrive in pandas as categoricals.
+DICTIONARY_COLUMNS = ("date", "state", "district")
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+INT_TYPE = pa.int32()
+
+# Below this many files a process pool costs more than it saves
+MIN_FILES_FOR_POOL = 64
+
+
+def list_raw_files(raw_dir):
+    """Raw batch files in a dataset directory, ordered by starting offset."""
+    if not raw_dir.exists():
+        return []
+
+    files = [
+        path for path in raw_dir.iterdir()
+        if RAW_FILE_PATTERN.match(path.name)
+    ]
+
+    return sorted(
+        files,
+        key=lambda path: int(RAW_FILE_PATTERN.match(path.name).group(1))
+    )
+
+
+def parse_dates(values):
+    """Parses each distinct date string once with the fixed DATE_FORMAT."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values)
+
+    codes, uniques = pd.factorize(values)
+    parsed = pd.DatetimeIndex(pd.to_datetime(uniques, format=DATE_FORMAT, errors="coerce"))
+
+    return parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+
+
+def _raw_schema(columns):
+    return pa.schema([
+        (col, DICTIONARY_TYPE if col in DICTIONARY_COLUMNS else INT_TYPE)
+        for col in columns
+    ])
+
+
+def read_raw_file(path, columns):
+    """Reads one raw file straight into an Arrow table with the declared schema."""
+    schema = _raw_schema(columns)
+
+    if path.suffix == ".parquet":
+        table = pq.read_table(
+            path,
+            columns=columns,
+            read_dictionary=[c for c in columns if c in DICTIONARY_COLUMNS]
+        )
+        return table.select(columns).cast(schema)
+
+    return pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types=schema
+        )
+    )
+
+
+def load_raw_batches(files, columns, workers=None):
+    """
+    Loads raw batch files with explicit dtypes, reading them in a process
+    pool when there are enough files to make that worthwhile.
+
+    Per-file tables are only chained together; the pandas frame is then
+    materialised in one allocation per column, and each distinct date
+    string is parsed once.
+    """
+    if not files:
+        raise RuntimeError("No raw files to load")
+
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) < MIN_FILES_FOR_POOL:
+        tables = [read_raw_file(f, columns) for f in files]
+    else:
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tables = list(executor.map(read_raw_file, files, [columns] * len(files), chunksize=chunksize))
+
+    table = pa.concat_tables(tables).unify_dictionaries()
+    df = table.to_pandas(types_mapper={INT_TYPE: pd.Int32Dtype()}.get)
+
+    if "date" in df:
+        df["date"] = parse_dates(df["date"])
+
+    return df
@@ -0,0 +1,67 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Processed tables are written as Parquet. Readers still fall back to the
+# CSV a previous pipeline version left behind.
+PARQUET_COMPRESSION = "zstd"
+DATE_COLUMNS = ("date", "year_month")
+
+# Geography keys are always stored with the same dictionary type, so row
+# groups written from different partitions share one schema
+DICTIONARY_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+
+def table_path(stem):
+    return stem.with_suffix(".parquet")
+
+
+def table_exists(stem):
+    return table_path(stem).exists() or stem.with_suffix(".csv").exists()
+
+
+def to_arrow(df, schema=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if schema is None:
+        schema = pa.schema([
+            field.with_type(DICTIONARY_TYPE) if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ])
+
+    return table.cast(schema)
+
+
+def write_table(df, stem):
+    pq.write_table(to_arrow(df), table_path(stem), compression=PARQUET_COMPRESSION)
+
+
+def read_table(stem, columns=None, filters=None):
+    path = table_path(stem)
+
+    if path.exists():
+        return pq.read_table(path, columns=columns, filters=filters).to_pandas()
+
+    csv_path = stem.with_suffix(".csv")
+    if not csv_path.exists():
+        raise RuntimeError(f"{stem.name} not found (looked for .parquet and .csv)")
+
+    df = pd.read_csv(csv_path, usecols=columns)
+
+    for col in DATE_COLUMNS:
+        if col in df:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    for col, op, value in filters or []:
+        df = df[_FILTER_OPS[op](df[col], value)]
+
+    return df
+
+
+_FILTER_OPS = {
+    "==": lambda s, v: s == v,
+    ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+}
@@ -1,80 +1,445 @@
+import argparse
 import subprocess
 import sys
+from pathlib import Path
 
-def run_step(name, command):
-    print(f"\n STARTING: {name}")
-    result = subprocess.run(command, shell=True)
+from pipeline.dag import MAX_JOBS, Pipeline, Step
+from processing.cleaning import SCHEMAS, run_cleaning
+from processing.geo_reference import GeoResolver
+from processing.merge import BUDGET_PARTITION_FREQ, digests_path, merge_daily, merge_daily_tables, write_merged
+from processing.monthly import aggregate_monthly, aggregate_monthly_chunked
+from processing.table_io import table_exists
+from features.engineering import DISTRICT_RATIOS, build_monthly_features, update_daily_features
+from features.temporal import TEMPORAL_VERSION
+from features.thresholds import PressureThresholds
+from modeling.anomaly import DAILY_MODEL, MONTHLY_MODEL, RESULTS_VERSION, train_monthly
+from modeling.online import ONLINE_VERSION, update_alerts
+from modeling.partitioned import PARTITIONS
+from modeling.registry import ModelRegistry
+from modeling.scoring import score_daily
+from serving.geo import SHAPES_VERSION, SIMPLIFY_TOLERANCE, build_district_shapes
+from serving.periods import ROLLUP_FREQS, build_period_rollups, rollup_stem
+from serving.results_store import write_results_store
+from serving.rollups import ROLLUPS_VERSION, DistrictRollups
+from utils.helpers import log
 
-    if result.returncode != 0:
-        print(f"\n FAILED: {name}")
-        sys.exit(1)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-    print(f" COMPLETED: {name}")
+INGESTION_DIR = PROJECT_ROOT / "src" / "api_ingestion"
+RAW_ROOT = PROJECT_ROOT / "data" / "raw"
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+REFERENCE_DIR = PROJECT_ROOT / "data" / "reference"
+MODEL_DIR = PROJECT_ROOT / "models"
 
+REFERENCE_PATH = REFERENCE_DIR / "districts.csv"
+GEOJSON_PATH = REFERENCE_DIR / "districts.geojson"
+STATE_PATH = PROCESSED_DIR / "pipeline_state.json"
 
-def main():
-    # ---------- INGESTION ----------
+AGG_STEMS = {name: PROCESSED_DIR / f"{name}_agg" for name in SCHEMAS}
+MASTER_STEM = PROCESSED_DIR / "master_district_daily"
+DAILY_FEATURES_PATH = PROCESSED_DIR / "master_features_district_daily.csv"
+TEMPORAL_STATE_STEM = PROCESSED_DIR / "daily_temporal_state"
+SKETCH_PATH = PROCESSED_DIR / "daily_pressure_sketch.npz"
+MONTHLY_PATH = PROCESSED_DIR / "master_district_monthly.csv"
+MONTHLY_FEATURES_PATH = PROCESSED_DIR / "master_features_district_monthly.csv"
+RESULTS_PATH = PROCESSED_DIR / "daily_anomaly_results.csv"
+SCORED_INDEX_PATH = PROCESSED_DIR / "daily_scored_rows.npz"
+EXPLANATIONS_PATH = PROCESSED_DIR / "daily_anomaly_explanations.csv"
+ROLLUPS_DIR = PROCESSED_DIR / "daily_district_rollups"
+SHAPES_PATH = PROCESSED_DIR / "district_shapes.geojson"
+STORE_PATH = PROCESSED_DIR / "daily_anomaly_results.arrow"
+MONTHLY_RESULTS_STEM = PROCESSED_DIR / "monthly_anomaly_results"
+ONLINE_STATE_PATH = PROCESSED_DIR / "online_detector_state.npz"
+ALERTS_PATH = PROCESSED_DIR / "anomaly_alerts.csv"
 
-    run_step(
-        "API Ingestion – Enrolment",
-        "python src/api_ingestion/enrolment_api.py --next-batch"
-    )
 
-    run_step(
-        "API Ingestion – Biometric",
-        "python src/api_ingestion/biometric_api.py --next-batch"
-    )
+# ---------- INGESTION ----------
 
-    run_step(
-        "API Ingestion – Demographic",
-        "python src/api_ingestion/demographic_api.py --next-batch"
-    )
-    # ---------- CLEANING ----------
-    run_step(
-        "Clean Enrolment Data",
-        "python notebooks/01_2_data_loading_and_validation_enrolment.py"
-    )
+def ingestion_step(name, after=None):
+    # Separate interpreter: the ingestion scripts use sibling imports and
+    # check for the API key at import time. Each script paces its own
+    # requests to the key's rate limit, so ingestions run one at a time
+    # (`after`, the previous one) while earlier datasets are being cleaned.
+    # The script's output is relayed line by line, like every step's.
+    script = INGESTION_DIR / f"{name}_api.py"
+
+    def run(ctx):
+        with subprocess.Popen(
+            [sys.executable, "-u", str(script), "--next-batch"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        ) as process:
+            for line in process.stdout:
+                log(line.rstrip("\n"))
+
+        if process.returncode != 0:
+            raise RuntimeError(f"{script.name} exited with status {process.returncode}")
 
-    run_step(
-        "Clean Biometric Data",
-        "python notebooks/01_3_data_loading_and_validation_biometric.py"
+    return Step(
+        f"API Ingestion – {name.title()}",
+        run,
+        outputs=[RAW_ROOT / name],
+        always=True,
+        deps=[after] if after else []
     )
 
-    run_step(
-        "Clean Demographic Data",
-        "python notebooks/01_data_loading_and_validation_demographic.py"
+
+# ---------- CLEANING ----------
+
+def cleaning_step(name, resolver, budget_mb, full_clean):
+    # Incremental by default: only raw files missing from the dataset's
+    # manifest are cleaned, deduplicated against the saved row hashes and
+    # added to the existing aggregate. A full clean rebuilds from every file.
+    def run(ctx):
+        agg = run_cleaning(
+            SCHEMAS[name],
+            RAW_ROOT / name,
+            PROCESSED_DIR,
+            incremental=not full_clean and table_exists(AGG_STEMS[name]),
+            resolver=resolver,
+            budget_mb=budget_mb
+        )
+
+        if agg is None:
+            return None
+
+        return {AGG_STEMS[name]: agg}
+
+    return Step(
+        f"Clean {name.title()} Data",
+        run,
+        inputs=[RAW_ROOT / name, REFERENCE_PATH],
+        outputs=[
+            AGG_STEMS[name],
+            PROCESSED_DIR / f"{name}_clean.csv",
+            PROCESSED_DIR / f"{name}_manifest.json",
+            PROCESSED_DIR / f"{name}_row_hashes.npy",
+        ],
+        params={"memory_budget_mb": budget_mb},
+        always=full_clean
     )
 
-    # ---------- DAILY MERGE ----------
-    run_step(
+
+# ---------- DAILY MERGE ----------
+
+def merge_step(budget_mb):
+    def run(ctx):
+        # With a budget only one month of every aggregate is in memory at a time
+        if budget_mb is not None:
+            rows = merge_daily_tables(list(AGG_STEMS.values()), MASTER_STEM, freq=BUDGET_PARTITION_FREQ)
+            log(f"Merged district-days: {rows}")
+            return None
+
+        merged = merge_daily([ctx.load(stem) for stem in AGG_STEMS.values()])
+        write_merged(merged, MASTER_STEM)
+        log(f"Merged district-days: {len(merged)}")
+        return {MASTER_STEM: merged}
+
+    return Step(
         "Merge Daily Aggregates",
-        "python notebooks/08_merge_aggregated_data.py"
+        run,
+        inputs=list(AGG_STEMS.values()),
+        outputs=[MASTER_STEM, digests_path(MASTER_STEM)],
+        params={"memory_budget_mb": budget_mb}
     )
 
-    # ---------- DAILY FEATURES ----------
-    run_step(
+
+# ---------- ONLINE ALERTS ----------
+
+def alerts_step(budget_mb):
+    # Runs straight off the merged table, in parallel with feature
+    # engineering; only district-days newer than the detector state are
+    # read, plus every day from a revised one on
+    def run(ctx):
+        update_alerts(MASTER_STEM, ONLINE_STATE_PATH, ALERTS_PATH, budget_mb)
+
+    return Step(
+        "Online Anomaly Alerts",
+        run,
+        inputs=[MASTER_STEM, digests_path(MASTER_STEM)],
+        outputs=[ONLINE_STATE_PATH, ALERTS_PATH],
+        params={"online_version": ONLINE_VERSION}
+    )
+
+
+# ---------- DAILY FEATURES ----------
+
+def daily_features_step(budget_mb, per_state):
+    # Extends the saved per-district window state and pressure sketches with
+    # the new days only; rebuilds from full history when there is no usable
+    # state or earlier days of the merged table changed
+    def run(ctx):
+        features = update_daily_features(
+            MASTER_STEM,
+            DAILY_FEATURES_PATH,
+            TEMPORAL_STATE_STEM,
+            SKETCH_PATH,
+            per_state=per_state,
+            budget_mb=budget_mb,
+            load=ctx.load
+        )
+
+        return None if features is None else {DAILY_FEATURES_PATH: features}
+
+    return Step(
         "Daily Feature Engineering",
-        "python notebooks/05_feature_engineering.py"
+        run,
+        inputs=[MASTER_STEM, digests_path(MASTER_STEM)],
+        outputs=[DAILY_FEATURES_PATH, TEMPORAL_STATE_STEM, SKETCH_PATH],
+        params={
+            "memory_budget_mb": budget_mb,
+            "feature_set": DISTRICT_RATIOS.key,
+            "temporal_version": TEMPORAL_VERSION,
+            "per_state_thresholds": per_state
+        }
     )
 
-    # ---------- MONTHLY ----------
-    run_step(
+
+# ---------- MONTHLY ----------
+
+def monthly_aggregation_step(budget_mb):
+    def run(ctx):
+        if budget_mb is not None:
+            monthly_agg = aggregate_monthly_chunked(MASTER_STEM, budget_mb)
+        else:
+            monthly_agg = aggregate_monthly(ctx.load(MASTER_STEM))
+
+        monthly_agg.to_csv(MONTHLY_PATH, index=False)
+        return {MONTHLY_PATH: monthly_agg}
+
+    return Step(
         "Monthly Aggregation",
-        "python notebooks/09_aggregate_monthly.py"
+        run,
+        inputs=[MASTER_STEM],
+        outputs=[MONTHLY_PATH],
+        params={"memory_budget_mb": budget_mb}
     )
 
-    run_step(
+
+def monthly_features_step(per_state):
+    def run(ctx):
+        features = build_monthly_features(ctx.load(MONTHLY_PATH), PressureThresholds(per_state=per_state))
+        features.to_csv(MONTHLY_FEATURES_PATH, index=False)
+        return {MONTHLY_FEATURES_PATH: features}
+
+    return Step(
         "Monthly Feature Engineering",
-        "python notebooks/10_feature_engineering_monthly.py"
+        run,
+        inputs=[MONTHLY_PATH],
+        outputs=[MONTHLY_FEATURES_PATH],
+        params={"feature_set": DISTRICT_RATIOS.key, "per_state_thresholds": per_state}
     )
 
-    # ---------- MODEL ----------
-    run_step(
+
+# ---------- MODEL ----------
+
+def model_step(budget_mb, retrain, partition):
+    # Scores only new or changed feature rows with the saved model; retrains
+    # when asked, on schedule or on drift (see modeling.scoring)
+    def run(ctx):
+        score_daily(
+            DAILY_FEATURES_PATH.with_suffix(""),
+            RESULTS_PATH,
+            MODEL_DIR,
+            SCORED_INDEX_PATH,
+            budget_mb=budget_mb,
+            retrain=retrain,
+            load_features=lambda: ctx.load(DAILY_FEATURES_PATH),
+            partition=partition,
+            explanations_path=EXPLANATIONS_PATH
+        )
+
+    return Step(
         "Anomaly Detection Model",
-        "python notebooks/07_predictive_model.py"
+        run,
+        inputs=[DAILY_FEATURES_PATH],
+        outputs=[
+            RESULTS_PATH,
+            SCORED_INDEX_PATH,
+            EXPLANATIONS_PATH,
+            ModelRegistry(MODEL_DIR, DAILY_MODEL).root,
+        ],
+        params={
+            "memory_budget_mb": budget_mb,
+            "results_version": RESULTS_VERSION,
+            "partition": partition
+        },
+        always=retrain
+    )
+
+
+def rollups_step(budget_mb):
+    # Per-district prefix sums over the scored days, so the dashboard ranks
+    # districts for any date range without scanning the results
+    def run(ctx):
+        DistrictRollups.build(RESULTS_PATH.with_suffix(""), ROLLUPS_DIR, budget_mb)
+
+    return Step(
+        "District Rollups",
+        run,
+        inputs=[RESULTS_PATH],
+        outputs=[ROLLUPS_DIR],
+        params={"memory_budget_mb": budget_mb, "rollups_version": ROLLUPS_VERSION}
     )
 
-    print("\n PIPELINE COMPLETED SUCCESSFULLY")
+
+def results_store_step(budget_mb):
+    # Results sorted and indexed by district, memory-mapped by the dashboard
+    # and the query API
+    def run(ctx):
+        write_results_store(RESULTS_PATH.with_suffix(""), STORE_PATH, budget_mb)
+
+    return Step(
+        "Results Store",
+        run,
+        inputs=[RESULTS_PATH],
+        outputs=[STORE_PATH],
+        params={"memory_budget_mb": budget_mb}
+    )
+
+
+def period_rollups_step(budget_mb):
+    # Weekly and quarterly views of the daily results for the dashboard
+    def run(ctx):
+        build_period_rollups(PROCESSED_DIR, budget_mb)
+
+    return Step(
+        "Weekly and Quarterly Rollups",
+        run,
+        inputs=[RESULTS_PATH],
+        outputs=[rollup_stem(PROCESSED_DIR, granularity) for granularity in ROLLUP_FREQS],
+        params={"memory_budget_mb": budget_mb, "freqs": ROLLUP_FREQS}
+    )
+
+
+def boundaries_step(resolver):
+    # District outlines for the dashboard map, simplified once per source file
+    def run(ctx):
+        build_district_shapes(GEOJSON_PATH, SHAPES_PATH, resolver)
+        resolver.save()
+
+    return Step(
+        "District Boundaries",
+        run,
+        inputs=[GEOJSON_PATH, REFERENCE_PATH],
+        outputs=[SHAPES_PATH],
+        params={"tolerance": SIMPLIFY_TOLERANCE, "shapes_version": SHAPES_VERSION}
+    )
+
+
+def monthly_model_step():
+    def run(ctx):
+        train_monthly(ctx.load(MONTHLY_FEATURES_PATH), MONTHLY_RESULTS_STEM, MODEL_DIR)
+
+    return Step(
+        "Monthly Anomaly Model",
+        run,
+        inputs=[MONTHLY_FEATURES_PATH],
+        outputs=[MONTHLY_RESULTS_STEM, ModelRegistry(MODEL_DIR, MONTHLY_MODEL).root],
+        params={"results_version": RESULTS_VERSION}
+    )
+
+
+def build_steps(budget_mb=None, ingest=True, per_state=False, retrain=False, partition=None,
+                full_clean=False):
+    # Shared by all cleaning steps so a spelling resolved once is never matched again
+    resolver = GeoResolver(REFERENCE_PATH, REFERENCE_DIR / "district_resolution_cache.json")
+
+    steps = []
+    if ingest:
+        previous = None
+        for name in SCHEMAS:
+            steps.append(ingestion_step(name, after=previous))
+            previous = steps[-1].name
+
+    steps += [cleaning_step(name, resolver, budget_mb, full_clean) for name in SCHEMAS]
+    steps += [
+        merge_step(budget_mb),
+        alerts_step(budget_mb),
+        daily_features_step(budget_mb, per_state),
+        monthly_aggregation_step(budget_mb),
+        monthly_features_step(per_state),
+        model_step(budget_mb, retrain, partition),
+        rollups_step(budget_mb),
+        results_store_step(budget_mb),
+        period_rollups_step(budget_mb),
+        monthly_model_step(),
+    ]
+
+    if GEOJSON_PATH.exists():
+        steps.append(boundaries_step(resolver))
+
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=None,
+        help="Run cleaning, aggregation, features and scoring in chunks that fit this budget"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=MAX_JOBS,
+        help="Steps run concurrently when their inputs are ready"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run every step even if its inputs are unchanged since the last run"
+    )
+    parser.add_argument(
+        "--per-state-thresholds",
+        action="store_true",
+        help="Flag high enrolment pressure against each state's own quantile"
+    )
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Refit the anomaly model on every row instead of scoring only new ones"
+    )
+    parser.add_argument(
+        "--partition",
+        choices=PARTITIONS,
+        default=None,
+        help="Fit one anomaly model per state or per district cluster"
+    )
+    parser.add_argument(
+        "--full-clean",
+        action="store_true",
+        help="Re-clean every raw file instead of only the ones not cleaned before"
+    )
+    parser.add_argument(
+        "--skip-ingestion",
+        action="store_true",
+        help="Process the raw batches already on disk without calling the APIs"
+    )
+    args = parser.parse_args()
+
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+    pipeline = Pipeline(
+        build_steps(
+            args.memory_budget_mb,
+            ingest=not args.skip_ingestion,
+            per_state=args.per_state_thresholds,
+            retrain=args.retrain,
+            partition=args.partition,
+            full_clean=args.full_clean
+        ),
+        STATE_PATH,
+        jobs=args.jobs,
+        force=args.force
+    )
+
+    if not pipeline.run():
+        sys.exit(1)
+
+    log("\n PIPELINE COMPLETED SUCCESSFULLY")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from serving.api import DEFAULT_HOST, DEFAULT_PORT, ResultsAPI
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help="Interface to listen on; the default only accepts local clients"
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(ResultsAPI(PROCESSED_DIR).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import asyncio
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+
+from serving.periods import GRANULARITIES, load_period_store, period_table
+from serving.results_store import ResultsStore, artifact_version, load_results_store
+from serving.rollups import META_FILE, DistrictRollups
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Pages of rows; a client walks a long series with offset = next_offset
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+DEFAULT_TOP_K = 10
+MAX_TOP_K = 100
+
+# Artifacts are checked for changes at most this often; a change reloads
+# them and empties the response cache
+RELOAD_SECONDS = 2.0
+RESPONSE_CACHE_SIZE = 1024
+
+# Decimal places of floats in responses
+JSON_DIGITS = 8
+
+# Longest request head accepted, so a client cannot hold unbounded memory
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResultsAPI:
+    """
+    Read-only JSON queries over the pipeline's outputs: the memory-mapped
+    results store (and its weekly, monthly and quarterly views), the
+    district rollups and the anomaly explanations.
+
+    A response is a function of the request and the artifact versions, so
+    its ETag is a hash of both: a client's If-None-Match is answered with
+    304 before any work, and bodies are kept in an LRU cache until the
+    artifacts change. Tables load lazily on first use.
+    """
+
+    def __init__(self, processed_dir, reload_seconds=RELOAD_SECONDS, cache_size=RESPONSE_CACHE_SIZE):
+        self.processed_dir = processed_dir
+        self.reload_seconds = reload_seconds
+        self.cache_size = cache_size
+
+        self.results_path = processed_dir / "daily_anomaly_results.csv"
+        self.store_path = processed_dir / "daily_anomaly_results.arrow"
+        self.explanations_path = processed_dir / "daily_anomaly_explanations.csv"
+        self.rollups_dir = processed_dir / "daily_district_rollups"
+
+        self.routes = {
+            "/health": self.health,
+            "/districts": self.districts,
+            "/series": self.series,
+            "/top": self.top,
+            "/explanations": self.explanations,
+        }
+
+        # Reentrant: the rollups fall back to the daily store under the lock
+        self.lock = threading.RLock()
+        self.cache = OrderedDict()
+        self.tables = {}
+        self.versions = None
+        self.version_tag = ""
+        self.checked = 0.0
+
+    # ---------- ARTIFACTS ----------
+
+    def _artifact_versions(self):
+        paths = {
+            "results": self.results_path,
+            "store": self.store_path,
+            "explanations": self.explanations_path,
+            "rollups": self.rollups_dir / META_FILE,
+        }
+        for granularity in GRANULARITIES[1:]:
+            paths[granularity] = period_table(self.processed_dir, granularity)
+
+        return {name: artifact_version(path) if path else None for name, path in paths.items()}
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.checked < self.reload_seconds:
+            return
+
+        self.checked = now
+        versions = self._artifact_versions()
+
+        if versions != self.versions:
+            with self.lock:
+                self.versions = versions
+                self.version_tag = hashlib.blake2b(repr(sorted(versions.items())).encode(), digest_size=8).hexdigest()
+                self.tables = {}
+                self.cache.clear()
+
+    def _table(self, name, load):
+        with self.lock:
+            if name not in self.tables:
+                self.tables[name] = load()
+
+            return self.tables[name]
+
+    def store(self, granularity="daily"):
+        if granularity == "daily":
+            if not self.results_path.exists():
+                raise BadRequest(HTTPStatus.SERVICE_UNAVAILABLE, "No scored results yet")
+
+            return self._table("daily", lambda: load_results_store(self.results_path, self.store_path))
+
+        if period_table(self.processed_dir, granularity) is None:
+            raise BadRequest(HTTPStatus.NOT_FOUND, f"No {granularity} results")
+
+        return self._table(granularity, lambda: load_period_store(self.processed_dir, granularity))
+
+    def rollups(self):
+        if (self.rollups_dir / META_FILE).exists():
+            return self._table("rollups", lambda: DistrictRollups.load(self.rollups_dir))
+
+        return self._table("rollups", lambda: DistrictRollups.from_frame(self.store().frame))
+
+    def explanation_store(self):
+        if not self.explanations_path.exists():
+            raise BadRequest(HTTPStatus.NOT_FOUND, "No anomaly explanations")
+
+        return self._table(
+            "explanations",
+            lambda: ResultsStore(pd.read_csv(self.explanations_path, parse_dates=["date"]))
+        )
+
+    # ---------- ENDPOINTS ----------
+
+    def health(self, query):
+        return {"status": "ok", "versions": {name: version is not None for name, version in self.versions.items()}}
+
+    def districts(self, query):
+        store = self.store()
+        rows = [
+            {"state": state, "district": district}
+            for state in store.states
+            for district in store.districts[state]
+        ]
+        offset, limit = _page(query)
+
+        return _envelope(rows[offset:offset + limit], len(rows), offset, limit)
+
+    def series(self, query):
+        granularity = _choice(query, "granularity", GRANULARITIES, "daily")
+        rows = _district_rows(self.store(granularity), query)
+        offset, limit = _page(query)
+
+        return _envelope(_records(rows.iloc[offset:offset + limit]), len(rows), offset, limit)
+
+    def top(self, query):
+        k = _integer(query, "k", DEFAULT_TOP_K, 1, MAX_TOP_K)
+        top = self.rollups().top(k, _date(query, "start"), _date(query, "end"))
+
+        return {"items": _records(top)}
+
+    def explanations(self, query):
+        rows = _district_rows(self.explanation_store(), query)
+        offset, limit = _page(query)
+
+        return _envelope(_records(rows.iloc[offset:offset + limit]), len(rows), offset, limit)
+
+    # ---------- REQUESTS ----------
+
+    def etag(self, path, query):
+        request = json.dumps([path, sorted(query.items())])
+        digest = hashlib.blake2b(request.encode(), digest_size=8, key=self.version_tag.encode()).hexdigest()
+        return f'"{digest}"'
+
+    def render(self, path, query):
+        """(status, JSON body) of one request; runs on a worker thread."""
+        handler = self.routes.get(path)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, _json({"error": f"Unknown path {path}"})
+
+        try:
+            return HTTPStatus.OK, _json(handler(query))
+        except BadRequest as e:
+            return e.status, _json({"error": str(e)})
+
+    async def respond(self, method, target, headers):
+        """(status, extra headers, body) of one request."""
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"Allow": "GET, HEAD"}, _json({"error": "Read-only API"})
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.refresh)
+
+        etag = self.etag(url.path, query)
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag in _etags(headers.get("if-none-match", "")):
+            return HTTPStatus.NOT_MODIFIED, cache_headers, b""
+
+        with self.lock:
+            body = self.cache.get(etag)
+            if body is not None:
+                self.cache.move_to_end(etag)
+
+        if body is None:
+            status, body = await loop.run_in_executor(None, self.render, url.path, query)
+
+            if status != HTTPStatus.OK:
+                return status, {}, body
+
+            with self.lock:
+                self.cache[etag] = body
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return HTTPStatus.OK, cache_headers, body
+
+    async def handle(self, reader, writer):
+        """One client connection: HTTP/1.1 requests, kept alive until closed."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    await _send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {}, b"", False, False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split()
+                except ValueError:
+                    await _send(writer, HTTPStatus.BAD_REQUEST, {}, b"", False, False)
+                    break
+
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    and version == "HTTP/1.1"
+                )
+
+                status, extra, body = await self.respond(method, target, headers)
+                await _send(writer, status, extra, body, keep_alive, method == "HEAD")
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving anomaly results on http://{host}:{port}")
+
+        async with server:
+            await server.serve_forever()
+
+
+async def _send(writer, status, extra, body, keep_alive, head_only):
+    headers = {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **extra,
+    }
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if not head_only:
+        writer.write(body)
+
+    await writer.drain()
+
+
+def _etags(header):
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def _json(payload):
+    return json.dumps(payload, separators=(",", ":"), allow_nan=False).encode()
+
+
+def _records(df):
+    # Dates as YYYY-MM-DD, NaN and inf as null; pandas' encoder is several
+    # times faster than building the dicts in Python
+    df = df.assign(date=df["date"].dt.strftime("%Y-%m-%d")) if "date" in df else df
+    return json.loads(df.to_json(orient="records", double_precision=JSON_DIGITS))
+
+
+def _envelope(items, total, offset, limit):
+    next_offset = offset + limit if offset + limit < total else None
+    return {"total": total, "offset": offset, "limit": limit, "next_offset": next_offset, "items": items}
+
+
+def _district_rows(store, query):
+    state = _required(query, "state")
+    district = _required(query, "district")
+
+    if (state, district) not in store.bounds:
+        raise BadRequest(HTTPStatus.NOT_FOUND, f"Unknown district {district}, {state}")
+
+    return store.district_rows(state, district, _date(query, "start"), _date(query, "end"))
+
+
+def _required(query, name):
+    if not query.get(name):
+        raise BadRequest(HTTPStatus.BAD_REQUEST, f"Missing query parameter {name}")
+
+    return query[name]
+
+
+def _choice(query, name, choices, default):
+    value = query.get(name, default)
+    if value not in choices:
+        raise BadRequest(HTTPStatus.BAD_REQUEST, f"{name} must be one of {', '.join(choices)}")
+
+    return value
+
+
+def _integer(query, name, default, lo, hi):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise BadRequest(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+
+    if not lo <= value <= hi:
+        raise BadRequest(HTTPStatus.BAD_REQUEST, f"{name} must be between {lo} and {hi}")
+
+    return value
+
+
+def _date(query, name):
+    if not query.get(name):
+        return None
+
+    try:
+        return pd.Timestamp(query[name])
+    except ValueError:
+        raise BadRequest(HTTPStatus.BAD_REQUEST, f"{name} must be a date (YYYY-MM-DD)")
+
+
+def _page(query):
+    return (
+        _integer(query, "offset", 0, 0, sys.maxsize),
+        _integer(query, "limit", DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE),
+    )
@@ -0,0 +1,43 @@
+import numpy as np
+
+# Points a time-series chart is drawn with: about one per horizontal pixel
+# of a full-width chart. More only adds transfer and render time.
+CHART_POINTS = 1500
+
+
+def lttb(x, y, threshold=CHART_POINTS):
+    """
+    Largest-Triangle-Three-Buckets: positions of `threshold` points of the
+    series (x ascending) that keep its visual shape. The first and last
+    points are kept; from every bucket in between the point forming the
+    largest triangle with the previous pick and the next bucket's mean.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    edges = np.append(edges, n)
+
+    picked = np.empty(threshold, dtype=np.intp)
+    picked[0], picked[-1] = 0, n - 1
+
+    a = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_lo, next_hi = edges[bucket + 1], edges[bucket + 2]
+
+        mean_x = x[next_lo:next_hi].mean()
+        mean_y = y[next_lo:next_hi].mean()
+
+        area = np.abs(
+            (x[a] - mean_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (mean_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        picked[bucket + 1] = a
+
+    return picked
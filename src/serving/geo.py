@@ -0,0 +1,155 @@
+import json
+import numpy as np
+
+from processing.geo_reference import normalize_name
+from utils.helpers import log
+
+# District boundaries come from a local GeoJSON (data/reference/districts.geojson,
+# one Polygon or MultiPolygon feature per district). Property names differ
+# between sources; the first one present is used.
+STATE_PROPERTIES = ("st_nm", "state", "STATE", "NAME_1", "ST_NM")
+DISTRICT_PROPERTIES = ("district", "DISTRICT", "dtname", "NAME_2", "DIST_NAME")
+
+# Douglas-Peucker tolerance in degrees (about 500 m), and coordinate
+# precision of the simplified shapes (about 10 m)
+SIMPLIFY_TOLERANCE = 0.005
+COORD_DECIMALS = 4
+
+# Bumped whenever the simplified output changes
+SHAPES_VERSION = 1
+
+
+def district_key(state, district):
+    """Join key between the shapes and the results: normalized names."""
+    return f"{normalize_name(state)}|{normalize_name(district)}"
+
+
+def simplify_ring(points, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Douglas-Peucker on one ring: keeps the point farthest from each chord
+    while it is farther than `tolerance`. Rings that would collapse below
+    a triangle are returned unchanged.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= 4:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    spans = [(0, len(points) - 1)]
+
+    while spans:
+        lo, hi = spans.pop()
+        if hi - lo < 2:
+            continue
+
+        inner = points[lo + 1:hi]
+        chord = points[hi] - points[lo]
+        offsets = inner - points[lo]
+        length = np.hypot(*chord)
+
+        # Closed rings start and end on the same point: distance to it
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / length
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = lo + 1 + farthest
+            keep[split] = True
+            spans += [(lo, split), (split, hi)]
+
+    simplified = points[keep]
+    return simplified if len(simplified) >= 4 else points
+
+
+def _simplify_polygon(rings, tolerance):
+    return [
+        np.round(simplify_ring(ring, tolerance), COORD_DECIMALS).tolist()
+        for ring in rings
+    ]
+
+
+def _property(properties, names):
+    for name in names:
+        if properties.get(name):
+            return str(properties[name])
+
+    return None
+
+
+def simplify_shapes(geojson, resolver=None, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    The district features of `geojson` with simplified rings and only a
+    "key" property (district_key of the names, canonicalized through the
+    resolver when there is a reference).
+    """
+    features = []
+
+    for feature in geojson["features"]:
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+
+        state = _property(properties, STATE_PROPERTIES)
+        district = _property(properties, DISTRICT_PROPERTIES)
+        if state is None or district is None:
+            continue
+
+        if resolver is not None and not resolver.empty:
+            code = resolver.resolve(state, district)
+            if code is not None:
+                state, district = resolver.canonical_names(code)
+
+        if geometry.get("type") == "Polygon":
+            coordinates = _simplify_polygon(geometry["coordinates"], tolerance)
+        elif geometry.get("type") == "MultiPolygon":
+            coordinates = [_simplify_polygon(polygon, tolerance) for polygon in geometry["coordinates"]]
+        else:
+            continue
+
+        features.append({
+            "type": "Feature",
+            "properties": {"key": district_key(state, district)},
+            "geometry": {"type": geometry["type"], "coordinates": coordinates},
+        })
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _fingerprint(path):
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_district_shapes(source_path, shapes_path, resolver=None, tolerance=SIMPLIFY_TOLERANCE):
+    shapes = simplify_shapes(json.loads(source_path.read_text()), resolver, tolerance)
+    shapes["source"] = {
+        "fingerprint": _fingerprint(source_path),
+        "tolerance": tolerance,
+        "version": SHAPES_VERSION,
+    }
+
+    shapes_path.parent.mkdir(parents=True, exist_ok=True)
+    shapes_path.write_text(json.dumps(shapes, separators=(",", ":")))
+
+    log(f"Simplified {len(shapes['features'])} district shapes")
+    return shapes
+
+
+def load_district_shapes(source_path, shapes_path, resolver=None, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Simplified shapes from `shapes_path`, rebuilt first when the source
+    GeoJSON, the tolerance or the format changed. None without a source.
+    """
+    if not source_path.exists():
+        return None
+
+    if shapes_path.exists():
+        shapes = json.loads(shapes_path.read_text())
+        expected = {"fingerprint": _fingerprint(source_path), "tolerance": tolerance, "version": SHAPES_VERSION}
+
+        if shapes.get("source") == expected:
+            return shapes
+
+    return build_district_shapes(source_path, shapes_path, resolver, tolerance)
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from features.engineering import DISTRICT_RATIOS, compute_ratios
+from processing.chunked import iter_chunks
+from processing.table_io import read_table, table_path, write_table
+from serving.results_store import RESULT_COLUMNS, ResultsStore
+
+# Dashboard granularities. Daily and monthly are the two models' own
+# results; weekly and quarterly are rolled up from the daily results at
+# pipeline time, so switching never aggregates rows in the dashboard.
+GRANULARITIES = ("daily", "weekly", "monthly", "quarterly")
+ROLLUP_FREQS = {"weekly": "W", "quarterly": "Q"}
+
+DAILY_RESULTS = "daily_anomaly_results"
+MONTHLY_RESULTS = "monthly_anomaly_results"
+
+COUNT_COLUMNS = list(dict.fromkeys(
+    col for ratio in DISTRICT_RATIOS.ratios for col in (ratio.numerator, ratio.denominator)
+))
+
+
+def rollup_stem(processed_dir, granularity):
+    return processed_dir / f"{DAILY_RESULTS}_{granularity}"
+
+
+def _period_sums(df, freq):
+    periods = df["date"].dt.to_period(freq).dt.start_time
+
+    return (
+        df.assign(date=periods, days=1)
+        .groupby(["state", "district", "date"], observed=True, sort=True)
+        .agg(
+            **{col: (col, "sum") for col in COUNT_COLUMNS},
+            anomaly_score=("anomaly_score", "min"),
+            anomaly_days=("is_anomaly", "sum"),
+            days=("days", "sum")
+        )
+        .reset_index()
+    )
+
+
+def _finish_rollup(rollup):
+    rollup = rollup.assign(**compute_ratios(rollup))
+    rollup["is_anomaly"] = (rollup["anomaly_days"] > 0).astype(np.int64)
+    rollup["anomaly_score"] = rollup["anomaly_score"].astype(np.float32)
+
+    return rollup
+
+
+def period_rollup(df, freq):
+    """
+    One row per district and period of `freq`, dated at the period start:
+    summed counts with the ratios recomputed from them (as the monthly
+    table does), the period's lowest anomaly score, its anomaly days and
+    scored days; a period is anomalous when any of its days is.
+    """
+    return _finish_rollup(_period_sums(df, freq))
+
+
+def period_rollup_chunked(chunks, freq):
+    """
+    period_rollup over chunks of the daily results. A period split across
+    chunks gets one partial row per chunk. These are combined the same
+    way: counts and days add, and the lowest score is kept.
+    """
+    partials = pd.concat([_period_sums(chunk, freq) for chunk in chunks], ignore_index=True)
+
+    combined = (
+        partials
+        .groupby(["state", "district", "date"], observed=True, sort=True)
+        .agg(
+            **{col: (col, "sum") for col in COUNT_COLUMNS},
+            anomaly_score=("anomaly_score", "min"),
+            anomaly_days=("anomaly_days", "sum"),
+            days=("days", "sum")
+        )
+        .reset_index()
+        .astype({"state": "category", "district": "category"})
+    )
+
+    return _finish_rollup(combined)
+
+
+def build_period_rollups(processed_dir, budget_mb=None):
+    """Writes the weekly and quarterly rollups of the daily results as Parquet."""
+    columns = ["date", "state", "district", "is_anomaly", "anomaly_score", *COUNT_COLUMNS]
+
+    if budget_mb is not None:
+        for granularity, freq in ROLLUP_FREQS.items():
+            chunks = iter_chunks(processed_dir / DAILY_RESULTS, budget_mb, columns=columns)
+            write_table(period_rollup_chunked(chunks, freq), rollup_stem(processed_dir, granularity))
+        return
+
+    daily = read_table(processed_dir / DAILY_RESULTS, columns=columns)
+
+    daily = daily.assign(
+        state=daily["state"].astype("category"),
+        district=daily["district"].astype("category")
+    )
+
+    for granularity, freq in ROLLUP_FREQS.items():
+        write_table(period_rollup(daily, freq), rollup_stem(processed_dir, granularity))
+
+
+def period_table(processed_dir, granularity):
+    """File of the results table behind a granularity, or None if it is missing."""
+    if granularity == "daily":
+        stem = processed_dir / DAILY_RESULTS
+    elif granularity == "monthly":
+        stem = processed_dir / MONTHLY_RESULTS
+    else:
+        stem = rollup_stem(processed_dir, granularity)
+
+    for path in (table_path(stem), stem.with_suffix(".csv")):
+        if path.exists():
+            return path
+
+    return None
+
+
+def load_period_store(processed_dir, granularity):
+    stem = period_table(processed_dir, granularity).with_suffix("")
+
+    if granularity == "daily":
+        return ResultsStore.load(stem)
+
+    if granularity == "monthly":
+        columns = ["year_month", *RESULT_COLUMNS[1:]]
+        return ResultsStore(read_table(stem, columns=columns).rename(columns={"year_month": "date"}))
+
+    return ResultsStore(read_table(stem, columns=[*RESULT_COLUMNS, "anomaly_days", "days"]))
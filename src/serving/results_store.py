@@ -0,0 +1,197 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from processing.chunked import iter_chunks, rows_per_chunk
+from processing.table_io import read_table, to_arrow
+
+# Columns of daily_anomaly_results the dashboard reads
+RESULT_COLUMNS = [
+    "date",
+    "state",
+    "district",
+    "is_anomaly",
+    "anomaly_score",
+    "enrolment_pressure",
+    "biometric_load_ratio",
+    "youth_population_ratio",
+    "adult_population_ratio",
+]
+
+
+def valid_name(name):
+    # Geography values that are only digits or punctuation are upstream noise
+    return any(c.isalpha() for c in str(name))
+
+
+def artifact_version(path):
+    """Cache key of a file: (mtime, size), or None while it does not exist."""
+    if not path.exists():
+        return None
+
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ResultsStore:
+    """
+    Scored daily rows sorted by (state, district, date) with categorical
+    geography. Each district's rows are one contiguous run, so a district
+    and date range is two binary searches and a positional slice rather
+    than a scan of every row.
+
+    The sorted rows can be saved as an uncompressed Arrow file that later
+    opens memory-mapped (save / open), so the dashboard and the API
+    start without re-parsing or re-sorting the results.
+    """
+
+    def __init__(self, df, presorted=False):
+        if not presorted:
+            df = df.assign(
+                state=df["state"].astype(str).astype("category"),
+                district=df["district"].astype(str).astype("category")
+            )
+            df = df.sort_values(["state", "district", "date"], kind="stable", ignore_index=True)
+
+        self.frame = df
+        self.dates = self.frame["date"].to_numpy()
+
+        states = self.frame["state"].cat.codes.to_numpy()
+        districts = self.frame["district"].cat.codes.to_numpy()
+        starts = np.flatnonzero(np.append(True, (states[1:] != states[:-1]) | (districts[1:] != districts[:-1])))
+        stops = np.append(starts[1:], len(self.frame))
+
+        self.bounds = {}
+        self.districts = {}
+        for start, stop in zip(starts, stops):
+            state = self.frame["state"].iat[start]
+            district = self.frame["district"].iat[start]
+            self.bounds[state, district] = (start, stop)
+
+            if valid_name(district):
+                self.districts.setdefault(state, []).append(district)
+
+        self.states = sorted(state for state in self.districts if valid_name(state))
+
+    @classmethod
+    def load(cls, results_stem, columns=RESULT_COLUMNS):
+        return cls(read_table(results_stem, columns=columns))
+
+    @classmethod
+    def open(cls, store_path):
+        # Numeric columns stay views of the mapped file
+        table = pa.ipc.open_file(pa.memory_map(str(store_path))).read_all()
+        return cls(table.to_pandas(split_blocks=True), presorted=True)
+
+    def save(self, store_path):
+        _write_store([to_arrow(self.frame)], store_path)
+
+    @property
+    def date_range(self):
+        if len(self.dates) == 0:
+            return None, None
+
+        return pd.Timestamp(self.dates.min()), pd.Timestamp(self.dates.max())
+
+    def district_rows(self, state, district, start=None, end=None):
+        """A district's rows dated within [start, end] (both optional), in date order."""
+        lo, hi = self.bounds.get((state, district), (0, 0))
+
+        if start is not None:
+            lo += np.searchsorted(self.dates[lo:hi], np.datetime64(start), side="left")
+
+        if end is not None:
+            hi = lo + np.searchsorted(self.dates[lo:hi], np.datetime64(end), side="right")
+
+        return self.frame.iloc[lo:hi]
+
+
+def _write_store(tables, store_path):
+    tmp_path = store_path.with_name(store_path.name + ".tmp")
+    writer = None
+
+    try:
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            for table in tables:
+                if writer is None:
+                    writer = pa.ipc.new_file(sink, table.schema)
+                writer.write_table(table)
+
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, store_path)
+
+
+def write_results_store(results_stem, store_path, budget_mb=None):
+    """
+    Saves the results as a store file. With a memory budget the results
+    are never loaded whole. A first pass counts each state's rows. Each
+    later pass then reads the results once more for a group of states
+    that fits the budget, and appends those states' rows, sorted, to the
+    file. Every group is encoded with the full sorted category lists, so
+    the file reads back as one presorted frame. A state larger than the
+    budget is still loaded whole.
+    """
+    if budget_mb is None:
+        ResultsStore.load(results_stem).save(store_path)
+        return
+
+    state_rows = {}
+    districts = set()
+    row_bytes = 0
+
+    for chunk in iter_chunks(results_stem, budget_mb, columns=RESULT_COLUMNS):
+        states = chunk["state"].astype(str)
+        for state, rows in states.value_counts().items():
+            state_rows[state] = state_rows.get(state, 0) + rows
+
+        districts.update(chunk["district"].astype(str).unique())
+        row_bytes = max(row_bytes, chunk.memory_usage(deep=True).sum() / max(len(chunk), 1))
+
+    states = sorted(state_rows)
+    districts = sorted(districts)
+    group_rows = rows_per_chunk(max(row_bytes, 1), budget_mb)
+
+    groups, current, current_rows = [], [], 0
+    for state in states:
+        if current and current_rows + state_rows[state] > group_rows:
+            groups.append(current)
+            current, current_rows = [], 0
+
+        current.append(state)
+        current_rows += state_rows[state]
+
+    if current:
+        groups.append(current)
+
+    def tables():
+        for group in groups:
+            parts = [
+                chunk[chunk["state"].astype(str).isin(group)]
+                for chunk in iter_chunks(results_stem, budget_mb, columns=RESULT_COLUMNS)
+            ]
+            df = pd.concat(parts, ignore_index=True)
+            df = df.assign(
+                state=pd.Categorical(df["state"].astype(str), categories=states),
+                district=pd.Categorical(df["district"].astype(str), categories=districts)
+            )
+
+            yield to_arrow(df.sort_values(["state", "district", "date"], kind="stable", ignore_index=True))
+
+    if groups:
+        _write_store(tables(), store_path)
+    else:
+        ResultsStore.load(results_stem).save(store_path)
+
+
+def load_results_store(results_path, store_path):
+    """The memory-mapped store when it is at least as new as the results, else the results."""
+    if store_path.exists() and store_path.stat().st_mtime_ns >= results_path.stat().st_mtime_ns:
+        return ResultsStore.open(store_path)
+
+    return ResultsStore.load(results_path.with_suffix(""))
@@ -0,0 +1,208 @@
+import json
+import numpy as np
+import pandas as pd
+
+from processing.chunked import iter_chunks
+from processing.table_io import read_table
+from serving.results_store import valid_name
+
+ROLLUP_COLUMNS = ["date", "state", "district", "is_anomaly", "anomaly_score", "enrolment_pressure"]
+META_FILE = "rollups.json"
+
+# Bumped whenever the arrays or their meaning change
+ROLLUPS_VERSION = 2
+
+
+class DistrictRollups:
+    """
+    Per-district running totals over the calendar days of the results, so
+    the "top anomalous districts" (and the map) of any date range cost
+    O(districts):
+
+    * anomaly days, scored days, enrolment pressure and anomaly score as
+      prefix sums, shape (districts, days + 1); a range total is two
+      column reads
+    * the lowest anomaly score as a sparse table: level j holds the minimum
+      of every 2**j-day window, and a range minimum is the smaller of two
+      overlapping windows
+
+    The arrays are saved as .npy files that load memory-mapped.
+    """
+
+    SUMS = ("anomaly_days", "days", "pressure", "score")
+
+    def __init__(self, states, districts, start, sums, min_levels):
+        self.states = states
+        self.districts = districts
+        self.start = start
+        self.sums = sums
+        self.min_levels = min_levels
+
+        # Once per district, not once per row and rerun
+        self.valid = np.array([
+            valid_name(state) and valid_name(district)
+            for state, district in zip(states, districts)
+        ], dtype=bool)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_chunks(lambda: [df])
+
+    @classmethod
+    def from_chunks(cls, read_chunks):
+        """
+        Rollups of the results yielded by `read_chunks()`, read twice: once
+        for the districts and the date range, once to add each chunk into
+        the per-day grids. Only one chunk and the grids are in memory.
+        """
+        pairs = set()
+        first = last = None
+
+        for chunk in read_chunks():
+            pairs.update(zip(chunk["state"].astype(str), chunk["district"].astype(str)))
+
+            if len(chunk):
+                days = chunk["date"].to_numpy(dtype="datetime64[D]")
+                first = days.min() if first is None else min(first, days.min())
+                last = days.max() if last is None else max(last, days.max())
+
+        keys = pd.MultiIndex.from_tuples(sorted(pairs), names=["state", "district"])
+        start = first if first is not None else np.datetime64("NaT", "D")
+        n_days = int((last - first).astype(np.int64)) + 1 if first is not None else 0
+
+        shape = (len(keys), n_days)
+        grids = {name: np.zeros(shape[0] * shape[1]) for name in cls.SUMS}
+        lowest = np.full(shape[0] * shape[1], np.inf, dtype=np.float32)
+
+        for chunk in read_chunks():
+            codes = keys.get_indexer(pd.MultiIndex.from_arrays([
+                chunk["state"].astype(str),
+                chunk["district"].astype(str)
+            ]))
+            day_ids = (chunk["date"].to_numpy(dtype="datetime64[D]") - start).astype(np.int64)
+            cells = codes * n_days + day_ids
+
+            values = {
+                "anomaly_days": chunk["is_anomaly"].to_numpy(dtype=np.float64),
+                "days": np.ones(len(chunk)),
+                "pressure": chunk["enrolment_pressure"].to_numpy(dtype=np.float64),
+                "score": chunk["anomaly_score"].to_numpy(dtype=np.float64),
+            }
+            for name, column in values.items():
+                grids[name] += np.bincount(cells, weights=column, minlength=len(grids[name]))
+
+            np.minimum.at(lowest, cells, chunk["anomaly_score"].to_numpy(dtype=np.float32))
+
+        sums = {}
+        for name, grid in grids.items():
+            sums[name] = np.zeros((len(keys), n_days + 1))
+            np.cumsum(grid.reshape(shape), axis=1, out=sums[name][:, 1:])
+
+        min_levels = [lowest.reshape(shape)]
+        width = 1
+        while 2 * width <= n_days:
+            previous = min_levels[-1]
+            min_levels.append(np.minimum(previous[:, :-width], previous[:, width:]))
+            width *= 2
+
+        return cls(
+            np.array([state for state, _ in keys], dtype=str),
+            np.array([district for _, district in keys], dtype=str),
+            start,
+            sums,
+            min_levels
+        )
+
+    @classmethod
+    def build(cls, results_stem, directory, budget_mb=None):
+        if budget_mb is None:
+            rollups = cls.from_frame(read_table(results_stem, columns=ROLLUP_COLUMNS))
+        else:
+            rollups = cls.from_chunks(lambda: iter_chunks(results_stem, budget_mb, columns=ROLLUP_COLUMNS))
+
+        rollups.save(directory)
+        return rollups
+
+    def save(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+
+        np.save(directory / "states.npy", self.states)
+        np.save(directory / "districts.npy", self.districts)
+        for name in self.SUMS:
+            np.save(directory / f"{name}.npy", self.sums[name])
+        for level, lowest in enumerate(self.min_levels):
+            np.save(directory / f"min_score_{level}.npy", lowest)
+
+        # Written last: readers key their cache on it
+        (directory / META_FILE).write_text(json.dumps({
+            "version": ROLLUPS_VERSION,
+            "start": str(self.start),
+            "levels": len(self.min_levels),
+        }, indent=2))
+
+    @classmethod
+    def load(cls, directory):
+        meta = json.loads((directory / META_FILE).read_text())
+
+        if meta["version"] != ROLLUPS_VERSION:
+            raise RuntimeError(f"{directory.name} was built by another version; rerun the pipeline")
+
+        return cls(
+            np.load(directory / "states.npy"),
+            np.load(directory / "districts.npy"),
+            np.datetime64(meta["start"], "D"),
+            {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in cls.SUMS},
+            [np.load(directory / f"min_score_{level}.npy", mmap_mode="r") for level in range(meta["levels"])]
+        )
+
+    def _day_bounds(self, start, end):
+        """[lo, hi) day positions of the dates within [start, end]."""
+        n_days = self.sums["days"].shape[1] - 1
+        lo = 0 if start is None else (np.datetime64(start, "D") - self.start).astype(np.int64)
+        hi = n_days if end is None else (np.datetime64(end, "D") - self.start).astype(np.int64) + 1
+
+        return int(np.clip(lo, 0, n_days)), int(np.clip(hi, 0, n_days))
+
+    def summary(self, start=None, end=None):
+        """Per-district totals over [start, end] for districts with rows in it."""
+        lo, hi = self._day_bounds(start, end)
+        totals = {name: self.sums[name][:, hi] - self.sums[name][:, lo] for name in self.SUMS}
+
+        if hi > lo:
+            level = int(np.log2(hi - lo))
+            lowest = self.min_levels[level]
+            worst = np.minimum(lowest[:, lo], lowest[:, hi - 2 ** level])
+        else:
+            worst = np.full(len(self.states), np.inf, dtype=np.float32)
+
+        keep = self.valid & (totals["days"] > 0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = {name: totals[name] / totals["days"] for name in ("anomaly_days", "pressure", "score")}
+
+        return pd.DataFrame({
+            "state": self.states[keep],
+            "district": self.districts[keep],
+            "anomaly_days": totals["anomaly_days"][keep].round().astype(np.int64),
+            "worst_score": worst[keep],
+            "avg_pressure": means["pressure"][keep],
+            "anomaly_rate": means["anomaly_days"][keep],
+            "mean_score": means["score"][keep],
+        })
+
+    def top(self, k=10, start=None, end=None):
+        """
+        The k districts with the most anomaly days in [start, end], ties
+        broken by the lowest score. argpartition finds the k-th largest
+        count in O(districts); only districts at or above it are sorted.
+        """
+        summary = self.summary(start, end)
+        if len(summary) <= k:
+            return summary.sort_values(["anomaly_days", "worst_score"], ascending=[False, True], ignore_index=True)
+
+        anomaly_days = summary["anomaly_days"].to_numpy()
+        kth = anomaly_days[np.argpartition(-anomaly_days, k - 1)[k - 1]]
+        candidates = np.flatnonzero(anomaly_days >= kth)
+
+        order = np.lexsort((summary["worst_score"].to_numpy()[candidates], -anomaly_days[candidates]))
+        return summary.iloc[candidates[order[:k]]].reset_index(drop=True)
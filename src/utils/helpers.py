@@ -0,0 +1,8 @@
+import sys
+
+
+def log(message):
+    # One write per line, so steps running on other threads do not
+    # interleave mid-line
+    sys.stdout.write(f"{message}\n")
+    sys.stdout.flush()